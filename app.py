@@ -7,8 +7,12 @@ import pytz
 from typing import Dict, Any
 
 from src.bazi.profile import BaziProfileManager
+from src.bazi.chart import ChartBuilder
 from src.bazi.daily_reading import DailyBaziReader
+from src.bazi.shared_calendar import get_shared_calendar
 from src.bazi.elements import get_element_relationship, get_element_properties
+from src.bazi.luck import GENDERS
+from src.bazi.pillar import parse_pillar
 from src.utils.date_utils import parse_date, validate_birth_datetime
 from src.ui.styles import apply_custom_styles, display_bazi_element
 from bazi_chat import BaziChatbot
@@ -18,8 +22,9 @@ def initialize_session_state():
     if 'profile_manager' not in st.session_state:
         st.session_state.profile_manager = BaziProfileManager()
     
-    if 'daily_reader' not in st.session_state:
-        st.session_state.daily_reader = DailyBaziReader('data/daily_bazi.csv')
+    # One reader per process, shared by every session and swapped out when
+    # the data file changes
+    st.session_state.daily_reader = get_shared_calendar('data/daily_bazi.csv', DailyBaziReader)
     
     if 'messages' not in st.session_state:
         st.session_state.messages = []
@@ -62,6 +67,7 @@ def render_profile_tab():
         birth_date = st.text_input("Birth Date (YYYY-MM-DD)")
         birth_time = st.text_input("Birth Time (HH:MM)")
         timezone = st.selectbox("Timezone", options=pytz.all_timezones)
+        gender = st.selectbox("Gender", GENDERS)
         
         if st.form_submit_button("Create Profile"):
             is_valid, error_msg = validate_birth_datetime(birth_date, birth_time, timezone)
@@ -71,8 +77,10 @@ def render_profile_tab():
                     "name": name,
                     "birth_date": birth_date,
                     "birth_time": birth_time,
-                    "timezone": timezone
+                    "timezone": timezone,
+                    "gender": gender
                 }
+                profile_data["bazi_chart"] = ChartBuilder().build(birth_date, birth_time, timezone)
                 
                 filename = st.session_state.profile_manager.save_profile(profile_data)
                 st.success(f"Profile saved successfully: {filename}")
@@ -95,30 +103,30 @@ def render_daily_reading_tab():
         
         with col1:
             display_bazi_element(
-                daily_reading['Year Pillar Chinese'],
+                daily_reading['Year Pillar'],
                 daily_reading['Year Pillar English'],
                 'Year Pillar'
             )
         
         with col2:
             display_bazi_element(
-                daily_reading['Month Pillar Chinese'],
+                daily_reading['Month Pillar'],
                 daily_reading['Month Pillar English'],
                 'Month Pillar'
             )
         
         with col3:
             display_bazi_element(
-                daily_reading['Day Pillar Chinese'],
+                daily_reading['Day Pillar'],
                 daily_reading['Day Pillar English'],
                 'Day Pillar'
             )
         
         # Display element relationships
         st.markdown("### Element Relationships")
-        day_element = daily_reading['Day Pillar English'].split()[0]
-        month_element = daily_reading['Month Pillar English'].split()[0]
-        year_element = daily_reading['Year Pillar English'].split()[0]
+        day_element = parse_pillar(daily_reading['Day Pillar']).element
+        month_element = parse_pillar(daily_reading['Month Pillar']).element
+        year_element = parse_pillar(daily_reading['Year Pillar']).element
         
         st.write(f"Day-Month: {get_element_relationship(day_element, month_element)}")
         st.write(f"Day-Year: {get_element_relationship(day_element, year_element)}")
@@ -156,11 +164,10 @@ def render_chat_tab():
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Get and display response
-        response = st.session_state.chatbot.get_response(prompt)
-        st.session_state.messages.append({"role": "assistant", "content": response})
+        # Stream the response into the bubble as it arrives
         with st.chat_message("assistant"):
-            st.markdown(response)
+            response = st.write_stream(st.session_state.chatbot.stream_response(prompt))
+        st.session_state.messages.append({"role": "assistant", "content": response})
     
     st.markdown("</div>", unsafe_allow_html=True)
 
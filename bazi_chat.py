@@ -1,13 +1,23 @@
-from typing import Dict, List, Generator, Union
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 import google.generativeai as genai
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.memory import ConversationBufferMemory
-from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
-from langchain.schema import HumanMessage, AIMessage
-from langchain.callbacks.base import BaseCallbackHandler
+from langchain.schema import HumanMessage
+import asyncio
+import hashlib
+import json
 import os
+import threading
+from datetime import datetime
 from dotenv import load_dotenv
+from src.bazi.chat_history import ChatHistoryWindow, estimate_tokens
+from src.bazi.llm_backend import DEFAULT_QUEUE_TIMEOUT, create_fake_model, get_llm_gate, use_fake_backend
+from src.bazi.luck import format_luck_summary, timeline_for_profile
+from src.bazi.pillar import Pillar, parse_pillar
+from src.bazi.reference_profiles import ReferenceProfile, get_reference_index, select_sections
+from src.bazi.response_cache import open_response_cache, prompt_context, response_key
+from src.bazi.scoring import analyze_chart, format_chart_analysis
 
 # Load environment variables
 load_dotenv()
@@ -15,40 +25,172 @@ load_dotenv()
 # Configure Gemini
 genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
 
-class StreamingCallbackHandler(BaseCallbackHandler):
-    """Callback handler for streaming LLM responses."""
-    
+# Directory of the reference profile documents used for prompt notes
+REFERENCE_PROFILES_DIR = 'profiles'
+
+# Profile fields sent to the model; everything else (name, birth details,
+# location) stays out so prompts depend only on the chart
+PROMPT_PROFILE_FIELDS = ('gender', 'bazi_chart')
+
+def format_daily_bazi(daily_bazi: Dict) -> str:
+    """Render a daily reading as one compact line per pillar for the prompt."""
+    lines = [f"Date: {daily_bazi.get('Date')}"]
+    for name in ('Year', 'Month', 'Day'):
+        text = daily_bazi.get(f'{name} Pillar')
+        if not text:
+            continue
+        pillar = parse_pillar(text)
+        lines.append(f"{name} Pillar: {pillar.chinese} ({pillar.english})")
+    lines.append(f"Day Officer: {daily_bazi.get('Day Officer', 'Unknown')}")
+    for description in daily_bazi.get('Branch Interactions') or ():
+        lines.append(description)
+    return "\n".join(lines)
+
+# Seconds a follower waits for the next chunk of a shared response; longer
+# than the leader may queue for a model slot
+FLIGHT_IDLE_TIMEOUT = 2 * DEFAULT_QUEUE_TIMEOUT
+
+def _apology(error: str) -> str:
+    return f"I apologize, but I encountered an error: {error}"
+
+class _Flight:
     def __init__(self):
-        self.streaming_func = None
+        """One upstream model call whose chunks are shared with every caller asking the same thing."""
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[str] = None
+        self._cond = threading.Condition()
+        # Wake-up callbacks of async followers, called from the leader's thread
+        self._listeners: List[Callable[[], None]] = []
+
+    def _notify(self) -> None:
+        self._cond.notify_all()
+        for listener in self._listeners:
+            try:
+                listener()
+            except RuntimeError:
+                pass  # The follower's event loop has closed
+
+    def publish(self, chunk: str) -> None:
+        with self._cond:
+            self.chunks.append(chunk)
+            self._notify()
+
+    def finish(self, error: Optional[str] = None) -> None:
+        with self._cond:
+            if not self.done:
+                self.done = True
+                self.error = error
+                self._notify()
+
+    def _take(self, position: int) -> Tuple[List[str], bool]:
+        """Chunks after position, and whether the flight has nothing more to send."""
+        new = self.chunks[position:]
+        return new, self.done
+
+    def follow(self, timeout: float = FLIGHT_IDLE_TIMEOUT) -> Iterator[str]:
+        """
+        Yield every chunk, past and future, until the leader finishes. Raises
+        TimeoutError if no chunk arrives for timeout seconds, e.g. when the
+        leader's consumer paused its generator and never closed it.
+        """
+        position = 0
+        while True:
+            with self._cond:
+                while position == len(self.chunks) and not self.done:
+                    if not self._cond.wait(timeout):
+                        raise TimeoutError("Timed out waiting for a shared response")
+                new, finished = self._take(position)
+            position += len(new)
+            yield from new
+            if finished:
+                return
 
-    def set_streaming_func(self, func):
-        self.streaming_func = func
+    async def afollow(self, timeout: float = FLIGHT_IDLE_TIMEOUT) -> AsyncIterator[str]:
+        """Async form of follow that waits without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        listener = lambda: loop.call_soon_threadsafe(event.set)
+        with self._cond:
+            self._listeners.append(listener)
+        try:
+            position = 0
+            while True:
+                event.clear()
+                with self._cond:
+                    new, finished = self._take(position)
+                position += len(new)
+                for chunk in new:
+                    yield chunk
+                if finished:
+                    return
+                if not new:
+                    try:
+                        await asyncio.wait_for(event.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        raise TimeoutError("Timed out waiting for a shared response")
+        finally:
+            with self._cond:
+                self._listeners.remove(listener)
+
+# Requests in flight by prompt hash; identical concurrent prompts share one call
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+_flight_stats = {'upstream_calls': 0, 'coalesced': 0}
+
+def _flight_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+def _join_flight(key: str) -> Tuple[_Flight, bool]:
+    """The flight for a prompt hash and whether the caller leads it (makes the upstream call)."""
+    with _flights_lock:
+        flight = _flights.get(key)
+        if flight is not None:
+            _flight_stats['coalesced'] += 1
+            return flight, False
+        flight = _flights[key] = _Flight()
+        _flight_stats['upstream_calls'] += 1
+        return flight, True
 
-    def on_llm_new_token(self, token: str, **kwargs) -> None:
-        """Stream tokens as they are generated."""
-        if self.streaming_func:
-            self.streaming_func(token)
+def _end_flight(key: str, flight: _Flight, error: Optional[str] = None) -> None:
+    with _flights_lock:
+        if _flights.get(key) is flight:
+            del _flights[key]
+    flight.finish(error)
+
+def get_coalescing_stats() -> Dict[str, int]:
+    """Upstream model calls made, requests served by joining one, and calls in flight."""
+    with _flights_lock:
+        return dict(_flight_stats, in_flight=len(_flights))
 
 class BaziChatbot:
     def __init__(self, profile_data: Dict, daily_bazi: Dict = None):
         """Initialize the BAZI chatbot with user profile and optional daily reading."""
         self.profile_data = profile_data
         self.daily_bazi = daily_bazi
+        self.auspicious_days = None
+        self.chart_analysis = self._format_chart_analysis(profile_data)
+        self.reference = self._find_reference(profile_data)
+        self.response_cache = open_response_cache()
         
-        # Create streaming callback handler
-        self.stream_handler = StreamingCallbackHandler()
+        # Every model call goes through the process-wide concurrency gate
+        self.gate = get_llm_gate()
         
-        # Initialize the LangChain Gemini model
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-pro",
-            temperature=0.6,  # Balanced temperature for natural yet consistent responses
-            convert_system_message_to_human=True,
-            google_api_key=os.getenv('GOOGLE_API_KEY'),
-            streaming=True,
-            callbacks=[self.stream_handler]
-        )
+        # Initialize the LangChain Gemini model (or the local fake for testing)
+        if use_fake_backend():
+            self.llm = create_fake_model()
+        else:
+            self.llm = ChatGoogleGenerativeAI(
+                model="gemini-pro",
+                temperature=0.6,  # Balanced temperature for natural yet consistent responses
+                convert_system_message_to_human=True,
+                google_api_key=os.getenv('GOOGLE_API_KEY'),
+                streaming=True
+            )
         
-        # Initialize conversation memory
+        # Full transcript for display; prompts use the token-budgeted window
+        self.history = ChatHistoryWindow()
+        self.last_request_tokens: Optional[Dict[str, int]] = None
         self.memory = ConversationBufferMemory(
             memory_key="history",
             input_key="input",
@@ -65,7 +207,10 @@ class BaziChatbot:
 
 Context (reference only when relevant):
 User Profile: {profile_data}
+Chart Analysis: {chart_analysis}
+Reference Notes: {reference_notes}
 Daily Reading: {daily_bazi}
+Auspicious Days Found: {auspicious_days}
 
 Chat History:
 {history}
@@ -74,62 +219,225 @@ User: {input}
 Mei: """
         
         self.prompt = PromptTemplate(
-            input_variables=["input", "profile_data", "daily_bazi", "history"],
+            input_variables=["input", "profile_data", "chart_analysis", "reference_notes", "daily_bazi", "auspicious_days", "history"],
             template=template
         )
-        
-        # Create the conversation chain
-        self.conversation = LLMChain(
-            llm=self.llm,
-            prompt=self.prompt,
-            memory=self.memory,
-            output_key="output",
-            verbose=False
-        )
 
-    def get_response(self, user_input: str, stream_func=None) -> Union[str, Generator[str, None, None]]:
+    @staticmethod
+    def _cache_key(user_input: str, inputs: Dict[str, str]) -> str:
+        """Identical questions with identical prompt context (history included) share one answer."""
+        return response_key(user_input, prompt_context(inputs))
+
+    def _prompt_inputs(self, user_input: str) -> Dict[str, str]:
+        """Values for every prompt variable."""
+        return {
+            "input": user_input,
+            "profile_data": self._format_profile(self.profile_data),
+            "chart_analysis": self.chart_analysis,
+            "reference_notes": self._format_reference_notes(user_input),
+            "daily_bazi": format_daily_bazi(self.daily_bazi) if self.daily_bazi else "No daily reading available",
+            "auspicious_days": json.dumps(self.auspicious_days) if self.auspicious_days else "No day search run",
+            "history": self.history.text
+        }
+
+    def stream_response(self, user_input: str) -> Iterator[str]:
+        """
+        Yield the response to user input chunk by chunk as the model produces
+        it (a cached answer arrives as one chunk). Once the stream is
+        exhausted the exchange is recorded in memory and successful answers
+        are cached.
+        """
+        inputs = self._prompt_inputs(user_input)
+        key = self._cache_key(user_input, inputs)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            self._remember(user_input, cached, sent_prompt=False)
+            yield cached
+            return
+
+        # Identical prompts already in flight are streamed from that call
+        prompt = self.prompt.format(**inputs)
+        flight_key = _flight_key(prompt)
+        flight, leader = _join_flight(flight_key)
+        if not leader:
+            chunks = []
+            try:
+                for chunk in flight.follow():
+                    chunks.append(chunk)
+                    yield chunk
+            except TimeoutError as e:
+                yield _apology(str(e))
+                return
+            if flight.error is not None:
+                yield _apology(flight.error)
+            else:
+                self._remember(user_input, "".join(chunks), sent_prompt=False)
+            return
+
+        chunks = []
+        completed = False
+        try:
+            self._remember_prompt_size(prompt)
+            with self.gate.slot():
+                for chunk in self.llm.stream(prompt):
+                    if chunk.content:
+                        chunks.append(chunk.content)
+                        flight.publish(chunk.content)
+                        yield chunk.content
+            self._record(user_input, key, "".join(chunks))
+            completed = True
+        except Exception as e:
+            print(f"Error in stream_response: {str(e)}")  # Log the error
+            _end_flight(flight_key, flight, str(e))
+            yield _apology(str(e))
+        finally:
+            # Followers must not wait on a leader whose consumer stopped reading
+            _end_flight(flight_key, flight, None if completed else "The request was interrupted")
+
+    async def astream_response(self, user_input: str) -> AsyncIterator[str]:
+        """Async form of stream_response, awaiting the gate and the model without blocking the loop."""
+        inputs = self._prompt_inputs(user_input)
+        key = self._cache_key(user_input, inputs)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            self._remember(user_input, cached, sent_prompt=False)
+            yield cached
+            return
+
+        prompt = self.prompt.format(**inputs)
+        flight_key = _flight_key(prompt)
+        flight, leader = _join_flight(flight_key)
+        if not leader:
+            chunks = []
+            try:
+                async for chunk in flight.afollow():
+                    chunks.append(chunk)
+                    yield chunk
+            except TimeoutError as e:
+                yield _apology(str(e))
+                return
+            if flight.error is not None:
+                yield _apology(flight.error)
+            else:
+                self._remember(user_input, "".join(chunks), sent_prompt=False)
+            return
+
+        chunks = []
+        completed = False
+        try:
+            self._remember_prompt_size(prompt)
+            async with self.gate.async_slot():
+                async for chunk in self.llm.astream(prompt):
+                    if chunk.content:
+                        chunks.append(chunk.content)
+                        flight.publish(chunk.content)
+                        yield chunk.content
+            self._record(user_input, key, "".join(chunks))
+            completed = True
+        except Exception as e:
+            print(f"Error in astream_response: {str(e)}")  # Log the error
+            _end_flight(flight_key, flight, str(e))
+            yield _apology(str(e))
+        finally:
+            _end_flight(flight_key, flight, None if completed else "The request was interrupted")
+
+    def _record(self, user_input: str, key: str, response: str) -> None:
+        """Save a completed exchange to memory and the response cache."""
+        self._remember(user_input, response)
+        self.response_cache.put(key, response)
+
+    def _remember(self, user_input: str, response: str, sent_prompt: bool = True) -> None:
+        """Add an exchange to the transcript and the prompt history window."""
+        if not sent_prompt:
+            # Cached and shared answers cost no prompt tokens
+            self.last_request_tokens = {'prompt': 0, 'history': self.history.tokens}
+        self.memory.save_context({"input": user_input}, {"output": response})
+        self.history.add_turn(user_input, response)
+
+    def _remember_prompt_size(self, prompt: str) -> None:
+        self.last_request_tokens = {'prompt': estimate_tokens(prompt), 'history': self.history.tokens}
+
+    def get_response(self, user_input: str, stream_func: Optional[Callable[[str], None]] = None) -> str:
         """
         Get a response from the chatbot based on user input and context.
         
         Args:
             user_input: The user's question or input
-            stream_func: Optional callback function to handle streaming tokens
+            stream_func: Optional callback called with each chunk as it arrives
             
         Returns:
-            If stream_func is provided, returns None (streams through callback)
-            Otherwise, returns the complete response as a string
+            The complete response as a string
         """
-        try:
-            # Set streaming callback if provided
+        chunks = []
+        for chunk in self.stream_response(user_input):
             if stream_func:
-                self.stream_handler.set_streaming_func(stream_func)
-            
-            # Format chat history
-            history = self.memory.chat_memory.messages
-            formatted_history = "\n".join([
-                f"User: {msg.content if isinstance(msg, HumanMessage) else ''}\nAI: {msg.content if isinstance(msg, AIMessage) else ''}"
-                for msg in history
-            ]) if history else ""
-
-            # Get response from the conversation chain
-            response = self.conversation({
-                "input": user_input,
-                "profile_data": str(self.profile_data),
-                "daily_bazi": str(self.daily_bazi) if self.daily_bazi else "No daily reading available",
-                "history": formatted_history
-            })
-            
-            # Return the complete response if not streaming
-            return response["output"]
+                stream_func(chunk)
+            chunks.append(chunk)
+        return "".join(chunks)
 
-        except Exception as e:
-            print(f"Error in get_response: {str(e)}")  # Log the error
-            return f"I apologize, but I encountered an error: {str(e)}"
+    async def aget_response(self, user_input: str, stream_func: Optional[Callable[[str], None]] = None) -> str:
+        """Async form of get_response."""
+        chunks = []
+        async for chunk in self.astream_response(user_input):
+            if stream_func:
+                stream_func(chunk)
+            chunks.append(chunk)
+        return "".join(chunks)
+
+    @staticmethod
+    def _format_chart_analysis(profile_data: Dict) -> str:
+        """Score the profile's chart up front so the LLM never has to derive it."""
+        chart = (profile_data or {}).get('bazi_chart')
+        if not chart or 'pillar_indices' not in chart:
+            return "No chart available"
+        analysis = format_chart_analysis(analyze_chart(chart['pillar_indices']))
+        timeline = timeline_for_profile(profile_data)
+        if timeline is not None:
+            analysis += "\n" + format_luck_summary(timeline, datetime.now().year)
+        return analysis
+
+    @staticmethod
+    def _find_reference(profile_data: Dict) -> Optional[ReferenceProfile]:
+        """Reference profile for a reference document or the closest match to the chart."""
+        profile_data = profile_data or {}
+        index = get_reference_index(REFERENCE_PROFILES_DIR)
+        if profile_data.get('filename'):
+            return index.get(profile_data['filename'])
+        chart = profile_data.get('bazi_chart')
+        if not chart or 'pillar_indices' not in chart:
+            return None
+        indices = chart['pillar_indices']
+        return index.find(Pillar(int(indices[2])).stem.english, indices)
+
+    @staticmethod
+    def _format_profile(profile_data: Dict) -> str:
+        """
+        Profile fields for the prompt. Reference documents go in as selected
+        sections instead, and personal details are left out so cached answers
+        can be shared between users with the same chart.
+        """
+        if not profile_data:
+            return str(profile_data)
+        return str({key: profile_data[key] for key in PROMPT_PROFILE_FIELDS if key in profile_data})
+
+    def _format_reference_notes(self, user_input: str) -> str:
+        """Only the reference sections the question calls for."""
+        if self.reference is None:
+            return "No reference profile"
+        return self.reference.render(select_sections(user_input))
 
     def update_daily_bazi(self, daily_bazi: Dict):
         """Update the daily BAZI reading data."""
         self.daily_bazi = daily_bazi
     
+    def update_auspicious_days(self, days: List[Dict]):
+        """Update the ranked auspicious days found by the day finder."""
+        self.auspicious_days = days
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the shared response cache, with request coalescing counters."""
+        return dict(self.response_cache.stats(), **get_coalescing_stats())
+    
     def get_chat_history(self) -> List[Dict]:
         """Retrieve the conversation history."""
         return [
@@ -1,10 +1,20 @@
 import streamlit as st
 from datetime import datetime
-import random
 from pathlib import Path
-import json
 import pandas as pd
 from bazi_chat import BaziChatbot
+from src.bazi.analysis import open_analysis_store
+from src.bazi.calendar_store import load_calendar
+from src.bazi.shared_calendar import get_calendar_stats, get_shared_calendar
+from src.bazi.chart import PILLARS, ChartBuilder
+from src.bazi.day_finder import RELATIONSHIPS, find_days_for_chart
+from src.bazi.elements import get_element_relationship
+from src.bazi.interactions import count_interactions_for_year, find_interactions
+from src.bazi.luck import GENDERS, timeline_for_profile
+from src.bazi.pillar import parse_pillar
+from src.bazi.profile_store import open_profile_store, profile_id
+from src.bazi.scoring import analyze_chart
+from src.bazi.sexagenary import DAY_OFFICERS, DAY_OFFICER_MEANINGS, get_pillars
 import pytz
 from typing import Dict, Any
 
@@ -29,85 +39,45 @@ def parse_date(date_str):
             continue
     return None
 
-def get_random_profile():
-    """Get a random profile from the profiles directory."""
-    profiles_dir = Path(__file__).parent / 'profiles'
-    profile_files = list(profiles_dir.glob('baziprofiledata*.md'))
-    if not profile_files:
-        raise FileNotFoundError("No profile files found in the profiles directory")
-    return random.choice(profile_files)
+PROFILES_DIR = Path(__file__).parent / 'user_profiles'
+
+# Profiles shown per sidebar page
+PROFILE_PAGE_SIZE = 20
+
+def get_profile_store():
+    """Get the process-wide profile repository."""
+    return open_profile_store(PROFILES_DIR)
+
+def get_analysis_store():
+    """Get the process-wide store of rendered analyses, shared by profiles with the same chart."""
+    return open_analysis_store(str(PROFILES_DIR / 'analyses'))
 
 def save_user_profile(user_data):
-    """Save user profile to a JSON file."""
-    profiles_dir = Path(__file__).parent / 'user_profiles'
-    profiles_dir.mkdir(exist_ok=True)
-    
-    # Create a filename from user's name
-    safe_name = "".join(c for c in user_data["name"] if c.isalnum())
-    filename = profiles_dir / f"{safe_name}.json"
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(user_data, f, indent=4)
-    
-    return filename
+    """Save user profile to the profile store."""
+    return get_profile_store().save(user_data)
 
 def load_user_profiles():
     """Load all user profiles."""
-    profiles_dir = Path(__file__).parent / 'user_profiles'
-    profiles = []
-    
-    if profiles_dir.exists():
-        for file in profiles_dir.glob('*.json'):
-            try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    profile = json.load(f)
-                    profiles.append(profile)
-            except:
-                continue
-    
-    return profiles
+    return list(get_profile_store().iter_profiles())
 
-def load_user_profile(filename):
+def list_user_profiles(search: str = '', page: int = 0):
+    """List one sidebar page of profile ids and names, with the total match count."""
+    store = get_profile_store()
+    return store.list(search, page * PROFILE_PAGE_SIZE, PROFILE_PAGE_SIZE), store.count(search)
+
+def load_user_profile(profile_id):
     """Load a specific user profile."""
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return None
+    return get_profile_store().get(profile_id)
 
 def load_daily_bazi():
-    """Load daily Bazi data from CSV file."""
+    """Get the process-wide daily Bazi calendar, reloading it if the CSV changed."""
     try:
-        # Try to load the CSV file
-        try:
-            df = pd.read_csv('Feb 2025 Bazi.csv')
-            
-            # Clean any potential whitespace in column names and data
-            df.columns = df.columns.str.strip()
-            for col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = df[col].str.strip()
-            
-            # Parse the date column
-            def parse_date(date_str):
-                try:
-                    return pd.to_datetime(date_str, format='%a %m/%d/%Y')
-                except:
-                    # Try alternative format if the first one fails
-                    return pd.to_datetime(date_str)
-            
-            df['Date'] = df['Date'].apply(parse_date)
-            return df
-            
-        except Exception as e:
-            st.error(f"Error loading Feb 2025 Bazi.csv: {str(e)}")
-            return None
-            
+        return get_shared_calendar('Feb 2025 Bazi.csv', load_calendar)
     except Exception as e:
         st.error(f"Error loading daily Bazi data: {str(e)}")
         return None
 
-def get_bazi_for_date(date, df):
+def get_bazi_for_date(date, calendar):
     """Get Bazi information for a specific date."""
     try:
         # Convert date to datetime.date for comparison
@@ -116,23 +86,14 @@ def get_bazi_for_date(date, df):
         elif hasattr(date, 'date'):
             date = date.date()
             
-        # Find matching row
-        matching_rows = df[df['Date'].dt.date == date]
-        if len(matching_rows) == 0:
-            st.error(f"No data found for date: {date}")
-            return None
-            
-        row = matching_rows.iloc[0]
-        return {
-            'Date': row['Date'],
-            'Day Pillar': row['Day Pillar'],
-            'Day Pillar English': row['Day Pillar English'],
-            'Month Pillar': row['Month Pillar'],
-            'Month Pillar English': row['Month Pillar English'],
-            'Year Pillar': row['Year Pillar'],
-            'Year Pillar English': row['Year Pillar English'],
-            'Day Officer': row['Day Officer']
-        }
+        # Pillars and Day Officer are computed by the calendar engine; a
+        # loaded calendar file overrides the officer for the dates it covers
+        bazi = get_pillars(date)
+        if calendar is not None:
+            row = calendar.get(date)
+            if row is not None and row['Day Officer']:
+                bazi['Day Officer'] = row['Day Officer']
+        return bazi
     except Exception as e:
         st.error(f"Error finding Bazi for date: {str(e)}")
         return None
@@ -155,40 +116,6 @@ def display_bazi_element(chinese, english, element_type):
         </div>
     """, unsafe_allow_html=True)
 
-def get_element_relationship(element1, element2):
-    """Analyze the relationship between two elements."""
-    # Define the five elements cycle
-    productive_cycle = {
-        'Wood': 'Fire',
-        'Fire': 'Earth',
-        'Earth': 'Metal',
-        'Metal': 'Water',
-        'Water': 'Wood'
-    }
-    
-    controlling_cycle = {
-        'Wood': 'Earth',
-        'Earth': 'Water',
-        'Water': 'Fire',
-        'Fire': 'Metal',
-        'Metal': 'Wood'
-    }
-    
-    # Clean up element names
-    element1 = element1.split()[-1]  # Get last word (e.g., "Yang Wood" -> "Wood")
-    element2 = element2.split()[-1]
-    
-    if element2 == productive_cycle.get(element1):
-        return f"{element1} produces {element2} - This is a productive and favorable relationship"
-    elif element1 == productive_cycle.get(element2):
-        return f"{element2} is produced by {element1} - This indicates support and nurturing"
-    elif element2 == controlling_cycle.get(element1):
-        return f"{element1} controls {element2} - This suggests influence and regulation"
-    elif element1 == controlling_cycle.get(element2):
-        return f"{element2} controls {element1} - This may indicate some challenges"
-    else:
-        return f"{element1} and {element2} have an indirect relationship"
-
 def validate_birth_datetime(date_str: str, time_str: str, timezone_str: str) -> bool:
     """Validate birth date, time and timezone input."""
     try:
@@ -299,7 +226,7 @@ def main():
     """, unsafe_allow_html=True)
 
     # Load daily Bazi data
-    daily_bazi_df = load_daily_bazi()
+    daily_calendar = load_daily_bazi()
 
     # Add session state for storing the current profile and view
     if 'current_profile' not in st.session_state:
@@ -310,7 +237,6 @@ def main():
     # Sidebar for profile selection
     with st.sidebar:
         st.title("Profile Selection")
-        profiles = load_user_profiles()
         
         # New Profile Button
         if st.button("➕ Create New Profile", use_container_width=True):
@@ -319,19 +245,45 @@ def main():
         
         st.markdown("---")
         
+        search = st.text_input("Search profiles", key="profile_search")
+        if st.session_state.get('profile_search_last') != search:
+            st.session_state.profile_search_last = search
+            st.session_state.profile_page = 0
+        page = st.session_state.get('profile_page', 0)
+        profiles, total = list_user_profiles(search, page)
+        
         if profiles:
             st.subheader("Saved Profiles")
-            for profile in profiles:
+            for entry in profiles:
                 col1, col2 = st.columns([4, 1])
                 with col1:
-                    if st.button(f"👤 {profile['name']}", key=f"profile_{profile['name']}", use_container_width=True):
-                        st.session_state.current_profile = profile
+                    if st.button(f"👤 {entry['name']}", key=f"profile_{entry['id']}", use_container_width=True):
+                        st.session_state.current_profile = load_user_profile(entry['id'])
+                with col2:
+                    if st.button("🗑️", key=f"delete_{entry['id']}", help="Delete profile"):
+                        get_profile_store().delete(entry['id'])
+                        current = st.session_state.current_profile
+                        if current and current.get('id', profile_id(current['name'])) == entry['id']:
+                            st.session_state.current_profile = None
+                        st.experimental_rerun()
+            
+            page_count = (total + PROFILE_PAGE_SIZE - 1) // PROFILE_PAGE_SIZE
+            if page_count > 1:
+                col1, col2, col3 = st.columns([1, 2, 1])
+                with col1:
+                    if st.button("◀️", key="profiles_prev", disabled=page == 0):
+                        st.session_state.profile_page = page - 1
+                        st.experimental_rerun()
                 with col2:
-                    if st.button("🗑️", key=f"delete_{profile['name']}", help="Delete profile"):
-                        # Add delete functionality here
-                        pass
+                    st.caption(f"Page {page + 1} of {page_count}")
+                with col3:
+                    if st.button("▶️", key="profiles_next", disabled=page >= page_count - 1):
+                        st.session_state.profile_page = page + 1
+                        st.experimental_rerun()
         else:
             st.info("No saved profiles found")
+        
+        st.caption(f"Calendar reloads: {get_calendar_stats()['reloads']}")
 
     # Main content area
     st.title("BAZI Profile System")
@@ -353,6 +305,7 @@ def main():
                     key="birth_date"
                 )
                 birth_time = st.time_input("Birth Time", key="birth_time")
+                gender = st.selectbox("Gender", GENDERS, key="gender")
 
             with col2:
                 timezone_options = [
@@ -383,14 +336,17 @@ def main():
                                 "birth_date": formatted_date,
                                 "birth_time": formatted_time,
                                 "timezone": timezone,
-                                "location": location
+                                "location": location,
+                                "gender": gender
                             }
+                            user_data["bazi_chart"] = ChartBuilder().build(
+                                formatted_date, formatted_time, timezone
+                            )
                             
-                            # Get and generate initial BAZI analysis
-                            profile_path = get_random_profile()
-                            with open(profile_path, 'r', encoding='utf-8') as f:
-                                profile_content = f.read()
-                            user_data["bazi_analysis"] = profile_content
+                            # Reference the shared analysis for this chart
+                            user_data["analysis_ref"] = get_analysis_store().put(
+                                user_data["bazi_chart"]["pillar_indices"]
+                            )
                             
                             save_user_profile(user_data)
                             st.session_state.current_profile = user_data
@@ -418,141 +374,234 @@ def main():
         tab1, tab2, tab3 = st.tabs(["🔮 BAZI Analysis", "📅 Daily BAZI", "💬 BAZI Chat"])
         
         with tab1:
-            if 'bazi_analysis' in profile:
+            if 'bazi_chart' in profile:
+                chart = profile['bazi_chart']
+                columns = st.columns(4)
+                for column, pillar in zip(columns, PILLARS):
+                    with column:
+                        display_bazi_element(
+                            chart[f'{pillar}_pillar_chinese'],
+                            chart[f'{pillar}_pillar'],
+                            f"{pillar.title()} Pillar"
+                        )
+                if chart.get('near_term_boundary'):
+                    st.info("This birth time falls close to a solar term boundary, so the month pillar should be double-checked.")
+
+                analysis = analyze_chart(chart['pillar_indices'])
+                st.markdown(f"### Day Master: {analysis['day_master']} ({analysis['day_master_strength']})")
+                columns = st.columns(4)
+                for column, pillar in zip(columns, PILLARS):
+                    details = analysis['pillars'][pillar]
+                    hidden = ", ".join(f"{stem['stem']} ({stem['ten_god']})" for stem in details['hidden_stems'])
+                    column.markdown(f"**{details['ten_god']}**  \nHidden: {hidden}")
+                st.markdown("### Element Balance")
+                st.bar_chart(pd.Series(analysis['element_balance'], name="%"))
+                st.caption(f"Dominant: {analysis['dominant_element']} · Weakest: {analysis['weakest_element']}")
+
+                timeline = timeline_for_profile(profile)
+                if timeline is not None:
+                    st.markdown("### Luck Pillars")
+                    st.caption(f"Running {'forward' if timeline.direction > 0 else 'backward'} "
+                               f"from age {timeline.start_age}, ten years each")
+                    # Page per profile, opening on the luck pillar in force this year
+                    luck_pages = st.session_state.setdefault('luck_pages', {})
+                    page_key = profile.get('id', profile_id(profile['name']))
+                    if page_key not in luck_pages:
+                        current = timeline.luck_pillar_for_year(datetime.now().year)
+                        luck_pages[page_key] = current['index'] if current else 0
+                    col1, col2, col3 = st.columns([1, 2, 1])
+                    with col1:
+                        if st.button("◀️ Earlier", disabled=luck_pages[page_key] == 0):
+                            luck_pages[page_key] -= 1
+                    with col3:
+                        if st.button("Later ▶️", disabled=luck_pages[page_key] >= timeline.page_count - 1):
+                            luck_pages[page_key] += 1
+                    for entry in timeline.page(luck_pages[page_key]):
+                        with col2:
+                            display_bazi_element(
+                                entry['pillar'].chinese,
+                                entry['pillar'].english,
+                                f"Ages {entry['start_age']:g}-{entry['end_age']:g} ({entry['start_year']}-{entry['end_year']})"
+                            )
+                        st.dataframe(pd.DataFrame([
+                            {"Year": annual['year'], "Age": annual['age'],
+                             "Pillar": annual['pillar'].chinese, "English": annual['pillar'].english}
+                            for annual in entry['annual']
+                        ]), hide_index=True, use_container_width=True)
+                else:
+                    st.caption("Add a gender to this profile to see its luck pillars.")
+            
+            analysis_text = get_analysis_store().for_profile(profile)
+            if analysis_text:
                 st.markdown("""<div class="bazi-analysis">""", unsafe_allow_html=True)
-                st.markdown(profile['bazi_analysis'])
+                st.markdown(analysis_text)
                 st.markdown("</div>", unsafe_allow_html=True)
             else:
                 st.warning("No BAZI analysis available for this profile")
                 
         with tab2:
-            if daily_bazi_df is not None:
-                st.markdown("<div class='details-card'>", unsafe_allow_html=True)
+            st.markdown("<div class='details-card'>", unsafe_allow_html=True)
+            
+            # Date selection with prev/next buttons
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("◀️ Previous Day"):
+                    if 'selected_date' in st.session_state:
+                        st.session_state.selected_date = st.session_state.selected_date - pd.Timedelta(days=1)
+                    else:
+                        st.session_state.selected_date = pd.Timestamp.now() - pd.Timedelta(days=1)
+            
+            with col2:
+                if 'selected_date' not in st.session_state:
+                    st.session_state.selected_date = pd.Timestamp.now()
+                selected_date = st.date_input("Select Date", st.session_state.selected_date)
+                st.session_state.selected_date = selected_date
+            
+            with col3:
+                if st.button("Next Day ▶️"):
+                    if 'selected_date' in st.session_state:
+                        st.session_state.selected_date = st.session_state.selected_date + pd.Timedelta(days=1)
+                    else:
+                        st.session_state.selected_date = pd.Timestamp.now() + pd.Timedelta(days=1)
+            
+            try:
+                chart = profile.get('bazi_chart') or ChartBuilder().build(
+                    profile['birth_date'], profile['birth_time'], profile['timezone']
+                )
+            except Exception as e:
+                # Legacy profiles may lack valid birth details
+                st.error(f"Could not build the chart for this profile: {str(e)}")
+                chart = None
+            daily_bazi = get_bazi_for_date(st.session_state.selected_date, daily_calendar)
+            if daily_bazi and chart:
+                daily_bazi['Branch Interactions'] = [
+                    found['description'] for found in
+                    find_interactions(chart['pillar_indices'], parse_pillar(daily_bazi['Day Pillar']).branch.code)
+                ]
+            
+            if daily_bazi:
+                # Display Day Officer prominently
+                st.markdown(f"""
+                    <div style="
+                        background-color: #2E3B2F;
+                        padding: 1rem;
+                        border-radius: 8px;
+                        margin: 1rem 0;
+                        text-align: center;
+                    ">
+                        <h3 style="color: #4CAF50; margin: 0;">Day Officer: {daily_bazi['Day Officer']}</h3>
+                    </div>
+                """, unsafe_allow_html=True)
+                
+                # Display Pillars
+                col1, col2, col3 = st.columns(3)
                 
-                # Date selection with prev/next buttons
-                col1, col2, col3 = st.columns([1, 2, 1])
                 with col1:
-                    if st.button("◀️ Previous Day"):
-                        if 'selected_date' in st.session_state:
-                            st.session_state.selected_date = st.session_state.selected_date - pd.Timedelta(days=1)
-                        else:
-                            st.session_state.selected_date = pd.Timestamp.now() - pd.Timedelta(days=1)
+                    display_bazi_element(
+                        daily_bazi['Day Pillar'],
+                        daily_bazi['Day Pillar English'],
+                        "Day Pillar"
+                    )
                 
                 with col2:
-                    if 'selected_date' not in st.session_state:
-                        st.session_state.selected_date = pd.Timestamp.now()
-                    selected_date = st.date_input("Select Date", st.session_state.selected_date)
-                    st.session_state.selected_date = selected_date
+                    display_bazi_element(
+                        daily_bazi['Month Pillar'],
+                        daily_bazi['Month Pillar English'],
+                        "Month Pillar"
+                    )
                 
                 with col3:
-                    if st.button("Next Day ▶️"):
-                        if 'selected_date' in st.session_state:
-                            st.session_state.selected_date = st.session_state.selected_date + pd.Timedelta(days=1)
-                        else:
-                            st.session_state.selected_date = pd.Timestamp.now() + pd.Timedelta(days=1)
+                    display_bazi_element(
+                        daily_bazi['Year Pillar'],
+                        daily_bazi['Year Pillar English'],
+                        "Year Pillar"
+                    )
                 
-                daily_bazi = get_bazi_for_date(st.session_state.selected_date, daily_bazi_df)
+                st.markdown("</div>", unsafe_allow_html=True)
                 
-                if daily_bazi:
-                    # Display Day Officer prominently
-                    st.markdown(f"""
-                        <div style="
-                            background-color: #2E3B2F;
-                            padding: 1rem;
-                            border-radius: 8px;
-                            margin: 1rem 0;
-                            text-align: center;
-                        ">
-                            <h3 style="color: #4CAF50; margin: 0;">Day Officer: {daily_bazi['Day Officer']}</h3>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Display Pillars
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        display_bazi_element(
-                            daily_bazi['Day Pillar'],
-                            daily_bazi['Day Pillar English'],
-                            "Day Pillar"
-                        )
-                    
-                    with col2:
-                        display_bazi_element(
-                            daily_bazi['Month Pillar'],
-                            daily_bazi['Month Pillar English'],
-                            "Month Pillar"
-                        )
-                    
-                    with col3:
-                        display_bazi_element(
-                            daily_bazi['Year Pillar'],
-                            daily_bazi['Year Pillar English'],
-                            "Year Pillar"
-                        )
-                    
-                    st.markdown("</div>", unsafe_allow_html=True)
-                    
-                    # Add personalized analysis section
-                    st.markdown("<div class='bazi-analysis'>", unsafe_allow_html=True)
-                    st.subheader(f"Daily BAZI Analysis for {profile['name']}")
-                    
-                    # Display the five elements analysis
-                    st.markdown("""
-                        <h4 style="color: #4CAF50;">Five Elements Analysis</h4>
-                    """, unsafe_allow_html=True)
-                    
-                    # Extract elements from the pillars
-                    day_element = daily_bazi['Day Pillar English'].split()[0]
-                    month_element = daily_bazi['Month Pillar English'].split()[0]
-                    year_element = daily_bazi['Year Pillar English'].split()[0]
-                    
-                    # Display element relationships
-                    day_relationship_month = get_element_relationship(day_element, month_element)
-                    day_relationship_year = get_element_relationship(day_element, year_element)
-                    
-                    st.write(f"""
-                        **Day Element:** {day_element}
-                        - Relationship with Month Element ({month_element}): {day_relationship_month}
-                        - Relationship with Year Element ({year_element}): {day_relationship_year}
-                    """)
-                    
+                # Add personalized analysis section
+                st.markdown("<div class='bazi-analysis'>", unsafe_allow_html=True)
+                st.subheader(f"Daily BAZI Analysis for {profile['name']}")
+                
+                # Display the five elements analysis
+                st.markdown("""
+                    <h4 style="color: #4CAF50;">Five Elements Analysis</h4>
+                """, unsafe_allow_html=True)
+                
+                # Extract elements from the pillars
+                day_element = parse_pillar(daily_bazi['Day Pillar']).element
+                month_element = parse_pillar(daily_bazi['Month Pillar']).element
+                year_element = parse_pillar(daily_bazi['Year Pillar']).element
+                
+                # Display element relationships
+                day_relationship_month = get_element_relationship(day_element, month_element)
+                day_relationship_year = get_element_relationship(day_element, year_element)
+                
+                st.write(f"""
+                    **Day Element:** {day_element}
+                    - Relationship with Month Element ({month_element}): {day_relationship_month}
+                    - Relationship with Year Element ({year_element}): {day_relationship_year}
+                """)
+                
+                st.markdown("""
+                    <h4 style="color: #4CAF50;">Personal Day Influence</h4>
+                """, unsafe_allow_html=True)
+                
+                # Add personalized analysis based on the Day Officer
+                day_officer = daily_bazi['Day Officer']
+                day_meaning = DAY_OFFICER_MEANINGS.get(day_officer, 'A day to observe and act according to circumstances.')
+                
+                st.write(f"""
+                    The Day Officer of "{day_officer}" suggests:
+                    - {day_meaning}
+                    - This combines with your {day_element} day element to influence your activities
+                    - Consider the relationship between your day element and the current month's {month_element} energy
+                """)
+
+                if chart:
                     st.markdown("""
-                        <h4 style="color: #4CAF50;">Personal Day Influence</h4>
+                        <h4 style="color: #4CAF50;">Branch Interactions</h4>
                     """, unsafe_allow_html=True)
-                    
-                    # Add personalized analysis based on the Day Officer
-                    day_officer_meanings = {
-                        'Open': 'A day for new beginnings and starting projects. Good for initiating actions.',
-                        'Close': 'A day for completing tasks and closing deals. Focus on finishing things.',
-                        'Balance': 'A day for finding harmony and making balanced decisions.',
-                        'Stable': 'A day for maintaining stability and routine tasks.',
-                        'Remove': 'A day for clearing obstacles and removing negativity.',
-                        'Full': 'A day of abundance and completion. Good for harvesting results.',
-                        'Danger': 'A day to be cautious and avoid risky ventures.',
-                        'Success': 'A day favorable for achieving goals and recognition.',
-                        'Receive': 'A day for accepting and receiving benefits.',
-                        'Establish': 'A day for establishing foundations and long-term plans.',
-                        'Destruction': 'A day for breaking down old patterns, avoid major decisions.',
-                        'Initiate': 'A day for taking initiative and leadership.'
-                    }
-                    
-                    day_officer = daily_bazi['Day Officer']
-                    day_meaning = day_officer_meanings.get(day_officer, 'A day to observe and act according to circumstances.')
-                    
-                    st.write(f"""
-                        The Day Officer of "{day_officer}" suggests:
-                        - {day_meaning}
-                        - This combines with your {day_element} day element to influence your activities
-                        - Consider the relationship between your day element and the current month's {month_element} energy
-                    """)
-
-                    st.markdown("</div>", unsafe_allow_html=True)
-                else:
-                    st.warning("No BAZI information available for the selected date")
-                    st.markdown("</div>", unsafe_allow_html=True)
+                    if daily_bazi['Branch Interactions']:
+                        for description in daily_bazi['Branch Interactions']:
+                            st.write(f"- {description}")
+                    else:
+                        st.write("The day branch does not clash, combine or harmonize with your chart.")
+                    year = st.session_state.selected_date.year
+                    counts = count_interactions_for_year(chart['pillar_indices'], year)
+                    st.caption(f"In {year}: " + ", ".join(f"{count} {name.lower()} days" for name, count in counts.items()))
+
+                st.markdown("</div>", unsafe_allow_html=True)
             else:
-                st.error("Could not load daily BAZI data")
+                st.warning("No BAZI information available for the selected date")
+                st.markdown("</div>", unsafe_allow_html=True)
+            
+            # Auspicious day search over the pillar engine
+            with st.expander("🔍 Find Auspicious Days"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    search_start = st.date_input("From", pd.Timestamp.now(), key="search_start")
+                    search_officers = st.multiselect("Day Officers", DAY_OFFICERS, key="search_officers")
+                with col2:
+                    search_end = st.date_input("To", pd.Timestamp.now() + pd.Timedelta(days=90), key="search_end")
+                    search_relationships = st.multiselect("Day element relationship", RELATIONSHIPS, key="search_relationships")
+                avoid_clashes = st.checkbox("Avoid days that clash with my chart", value=True, key="avoid_clashes")
+                
+                if st.button("Search Days", disabled=not chart):
+                    try:
+                        st.session_state.auspicious_days = find_days_for_chart(
+                            chart, search_start, search_end,
+                            avoid_clashes=avoid_clashes,
+                            officers=search_officers or None,
+                            relationships=search_relationships or None
+                        )
+                    except ValueError as e:
+                        st.error(f"Could not search days: {str(e)}")
+                
+                if st.session_state.get('auspicious_days'):
+                    st.dataframe(pd.DataFrame(st.session_state.auspicious_days), use_container_width=True)
+                elif 'auspicious_days' in st.session_state:
+                    st.info("No matching days in this range")
 
         with tab3:
             st.markdown("<div class='bazi-analysis'>", unsafe_allow_html=True)
@@ -562,12 +611,14 @@ def main():
             if 'chatbot' not in st.session_state:
                 st.session_state.chatbot = BaziChatbot(
                     profile_data=profile,
-                    daily_bazi=daily_bazi if daily_bazi_df is not None else None
+                    daily_bazi=daily_bazi
                 )
             
             # Update daily bazi in chatbot
-            if daily_bazi_df is not None and daily_bazi:
+            if daily_bazi:
                 st.session_state.chatbot.update_daily_bazi(daily_bazi)
+            if st.session_state.get('auspicious_days'):
+                st.session_state.chatbot.update_auspicious_days(st.session_state.auspicious_days)
             
             # Initialize message history if not exists
             if 'messages' not in st.session_state:
@@ -587,19 +638,23 @@ def main():
                 with st.chat_message("user"):
                     st.markdown(prompt)
                 
-                # Get chatbot response
+                # Stream the chatbot response into the bubble as it arrives
                 with st.chat_message("assistant"):
-                    with st.spinner("Analyzing your BAZI..."):
-                        try:
-                            response = st.session_state.chatbot.get_response(prompt)
-                            st.markdown(response)
-                            # Add assistant response to chat history
-                            st.session_state.messages.append({"role": "assistant", "content": response})
-                        except Exception as e:
-                            error_message = f"I apologize, but I encountered an error: {str(e)}"
-                            st.error(error_message)
-                            st.session_state.messages.append({"role": "assistant", "content": error_message})
-            
+                    try:
+                        response = st.write_stream(st.session_state.chatbot.stream_response(prompt))
+                        # Add assistant response to chat history
+                        st.session_state.messages.append({"role": "assistant", "content": response})
+                    except Exception as e:
+                        error_message = f"I apologize, but I encountered an error: {str(e)}"
+                        st.error(error_message)
+                        st.session_state.messages.append({"role": "assistant", "content": error_message})
+
+            cache_stats = st.session_state.chatbot.cache_stats()
+            st.caption(f"Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                       f"{cache_stats['coalesced']} coalesced")
+            tokens = st.session_state.chatbot.last_request_tokens
+            if tokens:
+                st.caption(f"Last prompt: ~{tokens['prompt']} tokens ({tokens['history']} of history)")
             st.markdown("</div>", unsafe_allow_html=True)
 
 if __name__ == "__main__":
@@ -0,0 +1,229 @@
+"""
+Deterministic profile analysis.
+
+Analysis text is assembled from reusable fragments (Day Master portrait,
+chart pattern, strength advice and element notes) chosen by the scoring
+engine, so the same four pillars always render the same markdown. Rendered
+analyses live in a content-addressed store keyed by a hash of the chart
+signature; profiles keep only that key.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Union
+
+from src.bazi.chart import PILLARS, ChartBuilder
+from src.bazi.elements import ELEMENTS, STEM_ELEMENTS, get_element_properties
+from src.bazi.pillar import Pillar
+from src.bazi.scoring import TEN_GODS, analyze_chart
+
+PathLike = Union[str, Path]
+
+# Bump when fragments or layout change so old cache entries are not reused
+TEMPLATE_VERSION = 1
+
+# Core nature, image and gifts for each Day Master stem
+DAY_MASTER_FRAGMENTS = (
+    ('Pioneering Tree', "Like a tall tree reaching for light, your Jia Wood Day Master grows steadily upward, "
+     "principled and protective of those who shelter beneath it.",
+     ('Clear sense of direction', 'Steady, principled growth', 'Natural protectiveness')),
+    ('Adaptive Vine', "Like a vine or flower that finds its way around any obstacle, your Yi Wood Day Master "
+     "thrives through flexibility, charm and persistence.",
+     ('Diplomacy and tact', 'Resilience through adaptation', 'Talent for networking')),
+    ('Radiant Sun', "Like the sun warming everything it touches, your Bing Fire Day Master is generous, "
+     "visible and energising to the people around you.",
+     ('Warmth and generosity', 'Natural visibility and presence', 'Optimism that lifts others')),
+    ('Guiding Lamp', "Like a candle in a dark room, your Ding Fire Day Master gives focused, steady light, "
+     "attentive to detail and to the needs of others.",
+     ('Insight and focus', 'Thoughtful care for others', 'Quiet, persistent influence')),
+    ('Domain Commander', "Like a mountain that provides both shelter and resources, your Wu Earth Day Master "
+     "builds strong foundations where others can flourish.",
+     ('Stability under pressure', 'Reliable leadership', 'Skill at building lasting structures')),
+    ('Nurturing Field', "Like fertile farmland, your Ji Earth Day Master nourishes growth, patiently turning "
+     "small beginnings into abundant results.",
+     ('Patience and care', 'Practical resourcefulness', 'Talent for developing people and ideas')),
+    ('Decisive Blade', "Like forged steel, your Geng Metal Day Master is direct, resolute and at its best "
+     "when cutting through complexity to act.",
+     ('Decisiveness', 'Courage and loyalty', 'Ability to execute under pressure')),
+    ('Refined Jewel', "Like a polished gem, your Xin Metal Day Master values quality and precision, and "
+     "shines when its refinement is recognised.",
+     ('Eye for quality', 'Precision and standards', 'Elegant self-expression')),
+    ('Boundless Ocean', "Like a great river or ocean, your Ren Water Day Master is expansive and "
+     "resourceful, carrying ideas and people a long way.",
+     ('Big-picture thinking', 'Adaptability and drive', 'Ability to connect people')),
+    ('Gentle Rain', "Like mist and rain, your Gui Water Day Master works quietly and pervasively, "
+     "intuitive and nourishing in subtle ways.",
+     ('Intuition', 'Subtle, lasting influence', 'Empathy and imagination')),
+)
+
+# Pattern named after the strongest Ten God family (relationship code order)
+PATTERN_FRAGMENTS = (
+    ('Companion-Rich Pattern', "Peers and self-reliance feature strongly: you draw strength from independence "
+     "and from working alongside equals."),
+    ('Output-Rich Pattern', "Expression and creativity feature strongly: your energy flows outward into ideas, "
+     "skills and performance."),
+    ('Wealth-Rich Pattern', "Opportunity and resources feature strongly: you are drawn to tangible goals and "
+     "to managing what you build."),
+    ('Power-Rich Pattern', "Structure and responsibility feature strongly: discipline, status and duty shape "
+     "how you grow."),
+    ('Resource-Rich Pattern', "Support and learning feature strongly: you have strong internal resources and "
+     "natural confidence in your approach."),
+)
+
+STRENGTH_FRAGMENTS = {
+    'Strong': ("Your Day Master is well supported, so growth comes from putting that strength to work.",
+               ('Channel energy into output and concrete goals', 'Balance firmness with flexibility',
+                'Share responsibility rather than carrying everything')),
+    'Weak': ("Your Day Master draws on limited support, so growth comes from building your base first.",
+             ('Seek mentors, learning and supportive allies', 'Pace commitments to protect your energy',
+              'Strengthen routines that ground you')),
+}
+
+# Element that best balances the chart: a strong Day Master benefits from
+# the element it produces, a weak one from the element that produces it
+_BALANCING_STEP = {'Strong': 1, 'Weak': -1}
+
+def chart_signature(indices: Sequence[int]) -> str:
+    """Canonical text identifying everything an analysis depends on."""
+    return f"v{TEMPLATE_VERSION}:" + "-".join(str(int(index)) for index in indices)
+
+def analysis_key(indices: Sequence[int]) -> str:
+    """Content address of a chart's analysis (SHA-256 of its signature)."""
+    return hashlib.sha256(chart_signature(indices).encode('utf-8')).hexdigest()
+
+def render_analysis(indices: Sequence[int]) -> str:
+    """Render the markdown analysis for a chart's pillar indices."""
+    scores = analyze_chart(indices)
+    day_stem = Pillar(int(indices[2])).stem
+    nature, portrait, gifts = DAY_MASTER_FRAGMENTS[day_stem.code]
+
+    # Strongest Ten God family across the visible and main hidden stems
+    families = [0] * 5
+    for name, details in scores['pillars'].items():
+        if name != 'day':
+            families[TEN_GODS.index(details['ten_god']) // 2] += 1
+        families[TEN_GODS.index(details['hidden_stems'][0]['ten_god']) // 2] += 1
+    pattern, pattern_text = PATTERN_FRAGMENTS[families.index(max(families))]
+
+    strength = scores['day_master_strength']
+    strength_text, growth = STRENGTH_FRAGMENTS[strength]
+    balancing = ELEMENTS[(STEM_ELEMENTS[day_stem.code] + _BALANCING_STEP[strength]) % 5]
+    properties = get_element_properties()
+    dominant, weakest = scores['dominant_element'], scores['weakest_element']
+
+    lines = ["## Your Bazi", ""]
+    for position, name in enumerate(PILLARS):
+        pillar = Pillar(int(indices[position]))
+        lines.append(f"- **{name.title()} Pillar:** {pillar.english} ({pillar.chinese})")
+    lines += [
+        "",
+        f"## Core Nature: {nature}",
+        "",
+        f"**Day Master:** {scores['day_master']} - {strength.lower()}, "
+        f"with {scores['day_master_support']:.0%} of the chart supporting it.",
+        "",
+        portrait,
+        "",
+        "### Natural Gifts",
+        "",
+        *[f"- {gift}" for gift in gifts],
+        "",
+        f"## Pattern: {pattern}",
+        "",
+        pattern_text,
+        "",
+        "### Growth Opportunities",
+        "",
+        strength_text,
+        "",
+        *[f"- {item}" for item in growth],
+        "",
+        "## Element Balance",
+        "",
+        ", ".join(f"{element} {share}%" for element, share in scores['element_balance'].items()),
+        "",
+        f"- **Dominant:** {dominant} - {properties[dominant]['characteristics']}",
+        f"- **Weakest:** {weakest} - {properties[weakest]['characteristics']}",
+        f"- **Balancing element:** {balancing}. Favour {properties[balancing]['color'].lower()} tones, "
+        f"the {properties[balancing]['direction'].lower()} and {properties[balancing]['season'].lower()} "
+        f"for important beginnings.",
+    ]
+    return "\n".join(lines) + "\n"
+
+class AnalysisStore:
+    def __init__(self, root: PathLike, cache_size: int = 256):
+        """Content-addressed analysis files under root, with an in-memory LRU."""
+        self.root = Path(root)
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: 'OrderedDict[str, str]' = OrderedDict()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.md"
+
+    def _remember(self, key: str, text: str) -> None:
+        with self._lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Stored analysis for a key, or None if it has not been rendered."""
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        try:
+            text = self._path(key).read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+        self._remember(key, text)
+        return text
+
+    def put(self, indices: Sequence[int]) -> str:
+        """Render and store a chart's analysis unless it already exists; returns its key."""
+        key = analysis_key(indices)
+        if self.get(key) is not None:
+            return key
+        text = render_analysis(indices)
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        self._remember(key, text)
+        return key
+
+    def for_profile(self, profile: Dict[str, Any]) -> Optional[str]:
+        """
+        Analysis text for a profile: its stored reference, re-rendered from the
+        chart if the entry is missing, or a legacy inline 'bazi_analysis'.
+        """
+        if profile.get('analysis_ref'):
+            text = self.get(profile['analysis_ref'])
+            if text is not None:
+                return text
+        chart = profile.get('bazi_chart')
+        if chart is None and profile.get('birth_date'):
+            try:
+                chart = ChartBuilder().build(profile['birth_date'], profile['birth_time'], profile['timezone'])
+            except ValueError:
+                chart = None
+        if chart is not None:
+            return self.get(self.put(chart['pillar_indices']))
+        return profile.get('bazi_analysis')
+
+@lru_cache(maxsize=None)
+def open_analysis_store(root: str) -> AnalysisStore:
+    """Get the process-wide analysis store for a directory."""
+    return AnalysisStore(root)
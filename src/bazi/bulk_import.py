@@ -0,0 +1,201 @@
+"""
+Bulk profile import.
+
+Streams birth records from a CSV or JSONL file, validates each row, builds
+charts in a process pool over chunks of rows and saves each chunk to the
+profile store in one batch. Bad rows are reported and skipped; the run
+carries on.
+
+Run from the command line with::
+
+    python -m src.bazi.bulk_import records.csv --profiles-dir user_profiles
+    python -m src.bazi.bulk_import records.jsonl --errors errors.csv --workers 4
+
+Rows need name, birth_date, birth_time (HH:MM, 24-hour) and timezone (an
+IANA name); any other columns, such as gender or location, are kept. An id
+column is ignored: every imported row gets a new id, numbered after any
+profile already using its name.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from src.bazi.chart import ChartBuilder, chart_from_batch
+from src.bazi.profile_store import ProfileRepository, open_profile_store
+from src.utils.date_utils import validate_birth_datetime
+
+PathLike = Union[str, Path]
+
+REQUIRED_FIELDS = ('name', 'birth_date', 'birth_time', 'timezone')
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# (row number, record) pairs; row numbers are 1-based data rows
+Row = Tuple[int, Dict[str, Any]]
+
+def iter_records(path: PathLike) -> Iterator[Row]:
+    """Stream records from a .csv or .jsonl/.ndjson file."""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.suffix.lower() == '.csv':
+            for row, record in enumerate(csv.DictReader(f), start=1):
+                yield row, {key.strip(): (value or '').strip() for key, value in record.items() if key}
+        else:
+            for row, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield row, json.loads(line)
+                    except ValueError as e:
+                        yield row, {'_error': f"Invalid JSON: {e}"}
+
+def validate_record(record: Dict[str, Any]) -> Optional[str]:
+    """Error message for a record that cannot be imported, or None if it is valid."""
+    if '_error' in record:
+        return record['_error']
+    missing = [field for field in REQUIRED_FIELDS if not str(record.get(field, '')).strip()]
+    if missing:
+        return f"Missing {', '.join(missing)}"
+    is_valid, error = validate_birth_datetime(
+        str(record['birth_date']), str(record['birth_time']), str(record['timezone'])
+    )
+    return None if is_valid else error
+
+def build_chunk(rows: List[Row]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Build charts for a chunk of validated rows (runs in a worker process).
+    Returns:
+        (profiles with a 'bazi_chart', errors) for the chunk
+    """
+    builder = ChartBuilder()
+    # Incoming ids are never trusted as storage keys
+    rows = [(row, {key: value for key, value in record.items() if key != 'id'}) for row, record in rows]
+    try:
+        pillars = builder.build_batch([record for _, record in rows])
+    except Exception:
+        # One bad row fails the whole batch; fall back to rows one at a time
+        profiles, errors = [], []
+        for row, record in rows:
+            try:
+                chart = builder.build(record['birth_date'], record['birth_time'], record['timezone'])
+                profiles.append(dict(record, bazi_chart=chart))
+            except Exception as e:
+                errors.append({'row': row, 'name': record.get('name'), 'error': str(e)})
+        return profiles, errors
+    return [dict(record, bazi_chart=chart_from_batch(pillars, i)) for i, (_, record) in enumerate(rows)], []
+
+def _chunks(rows: Iterator[Row], errors: List[Dict[str, Any]], chunk_size: int) -> Iterator[List[Row]]:
+    """Group valid rows into chunks, collecting validation errors on the way."""
+    chunk: List[Row] = []
+    for row, record in rows:
+        error = validate_record(record)
+        if error:
+            errors.append({'row': row, 'name': record.get('name'), 'error': error})
+            continue
+        chunk.append((row, record))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def import_profiles(
+    path: PathLike,
+    store: ProfileRepository,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Import a CSV or JSONL file of birth records into a profile store.
+    Args:
+        path: Source file
+        store: Destination repository; each chunk is saved with one save_many call,
+            giving every row a fresh id
+        chunk_size: Rows per chart batch and per store write
+        workers: Worker processes (defaults to the CPU count)
+        progress: Called after each chunk with the running totals
+    Returns:
+        Dictionary with 'imported', 'failed', 'seconds', 'rate' and the
+        per-row 'errors'
+    """
+    errors: List[Dict[str, Any]] = []
+    imported = 0
+    started = time.perf_counter()
+
+    def report() -> Dict[str, Any]:
+        seconds = time.perf_counter() - started
+        return {'imported': imported, 'failed': len(errors), 'seconds': round(seconds, 2),
+                'rate': round(imported / seconds, 1) if seconds else 0.0}
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Bound the chunks in flight so huge files stream instead of queueing
+        max_pending = 2 * workers
+        pending: Set[Future] = set()
+        chunks = _chunks(iter_records(path), errors, chunk_size)
+
+        def drain(return_when: str) -> None:
+            nonlocal imported, pending
+            done, pending = wait(pending, return_when=return_when)
+            for future in done:
+                profiles, chunk_errors = future.result()
+                errors.extend(chunk_errors)
+                # Every profile gets a new id, so each save adds one
+                imported += store.save_many(profiles, fresh=True)
+                if progress:
+                    progress(report())
+
+        for chunk in chunks:
+            pending.add(pool.submit(build_chunk, chunk))
+            if len(pending) >= max_pending:
+                drain(FIRST_COMPLETED)
+        if pending:
+            drain(ALL_COMPLETED)
+
+    result = report()
+    result['errors'] = sorted(errors, key=lambda error: error['row'])
+    return result
+
+def write_errors(errors: List[Dict[str, Any]], path: PathLike) -> None:
+    """Write per-row errors to a CSV file."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['row', 'name', 'error'])
+        writer.writeheader()
+        writer.writerows(errors)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import birth records as BAZI profiles.")
+    parser.add_argument('source', help="CSV or JSONL file of birth records")
+    parser.add_argument('--profiles-dir', default='user_profiles', help="Profile store directory")
+    parser.add_argument('--backend', choices=('sqlite', 'json'), help="Profile store backend")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--errors', help="Write per-row errors to this CSV file")
+    args = parser.parse_args(argv)
+
+    def progress(totals: Dict[str, Any]) -> None:
+        print(f"\rImported {totals['imported']}, failed {totals['failed']} "
+              f"({totals['rate']} profiles/s)", end='', file=sys.stderr, flush=True)
+
+    store = open_profile_store(args.profiles_dir, args.backend)
+    result = import_profiles(args.source, store, args.chunk_size, args.workers, progress)
+    print(file=sys.stderr)
+    print(f"Imported {result['imported']} profiles, {result['failed']} failed, in {result['seconds']}s")
+
+    if args.errors:
+        write_errors(result['errors'], args.errors)
+    else:
+        for error in result['errors'][:20]:
+            print(f"  row {error['row']} ({error['name']}): {error['error']}")
+        if result['failed'] > 20:
+            print(f"  ... and {result['failed'] - 20} more (use --errors to save them all)")
+    return 0 if result['imported'] or not result['failed'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
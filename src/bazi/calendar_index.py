@@ -0,0 +1,66 @@
+"""
+Date-indexed calendar lookups.
+
+Rows of a daily calendar table are addressed by their day offset from the
+first date in the table, so a lookup is an array index rather than a boolean
+mask over the whole DataFrame.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.bazi.sexagenary import DateLike, as_date
+
+def day_number(day: DateLike) -> int:
+    """Days since 1970-01-01 for any supported date input."""
+    return int(np.datetime64(as_date(day), 'D').astype(np.int64))
+
+class CalendarIndex:
+    def __init__(self, df: pd.DataFrame, date_column: str = 'Date'):
+        """
+        Index a calendar table by day.
+        Args:
+            df: Calendar rows, one per date
+            date_column: Column holding the row dates
+        """
+        self.date_column = date_column
+        self._records = df.to_dict('records')
+
+        days = pd.to_datetime(df[date_column]).values.astype('datetime64[D]').astype(np.int64)
+        self.start_day = int(days.min()) if len(days) else 0
+        span = int(days.max()) - self.start_day + 1 if len(days) else 0
+
+        # Position of each day's row in self._records, -1 where there is none
+        self._positions = np.full(span, -1, dtype=np.int32)
+        self._positions[days - self.start_day] = np.arange(len(days), dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, day: DateLike) -> bool:
+        return self._position(day) >= 0
+
+    def _position(self, day: DateLike) -> int:
+        """Row position for a date, or -1 if the table has no row for it."""
+        offset = day_number(day) - self.start_day
+        if offset < 0 or offset >= len(self._positions):
+            return -1
+        return int(self._positions[offset])
+
+    def get(self, day: DateLike) -> Optional[Dict[str, Any]]:
+        """Get the row for a date as a dictionary, or None if it is missing."""
+        position = self._position(day)
+        if position < 0:
+            return None
+        return dict(self._records[position])
+
+    def get_range(self, start: DateLike, end: DateLike) -> List[Dict[str, Any]]:
+        """Get the rows for all dates from start to end inclusive, in date order."""
+        first = max(day_number(start) - self.start_day, 0)
+        last = min(day_number(end) - self.start_day + 1, len(self._positions))
+        if first >= last:
+            return []
+        positions = self._positions[first:last]
+        return [dict(self._records[p]) for p in positions[positions >= 0]]
+
@@ -0,0 +1,240 @@
+"""
+Binary columnar calendar store.
+
+Calendar CSVs remain the ingestion format; a build step compiles them into a
+compact file of int8 columns (stem and branch codes for each pillar plus the
+Day Officer code) indexed by day. The app memory-maps that file, so startup
+costs no parsing and two centuries of days take a few hundred KB.
+
+File layout (little endian)::
+
+    magic       8 bytes   b'BAZICAL1'
+    source      int64     mtime_ns of the CSV it was compiled from (0 = none)
+    start_day   int32     days since 1970-01-01 of the first row
+    count       int32     number of rows (days)
+    columns     7 x count int8, in COLUMNS order; -1 where a value is unknown
+
+Build from the command line with::
+
+    python -m src.bazi.calendar_store build "Feb 2025 Bazi.csv"
+    python -m src.bazi.calendar_store generate data/calendar_1900_2100.cal
+    python -m src.bazi.calendar_store verify "Feb 2025 Bazi.csv"
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.bazi.calendar_index import day_number
+from src.bazi.sexagenary import (
+    DAY_OFFICERS, MAX_YEAR, MIN_YEAR, PILLAR_CHINESE, PILLAR_ENGLISH, DateLike,
+    day_officer_codes, get_pillars_array, pillar_index
+)
+
+MAGIC = b'BAZICAL1'
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('source', '<i8'), ('start_day', '<i4'), ('count', '<i4')])
+
+COLUMNS = ('year_stem', 'year_branch', 'month_stem', 'month_branch',
+           'day_stem', 'day_branch', 'officer')
+
+COMPILED_SUFFIX = '.cal'
+
+_PILLAR_CODES = {name: i for i, name in enumerate(PILLAR_CHINESE)}
+_OFFICER_CODES = {name: i for i, name in enumerate(DAY_OFFICERS)}
+
+PathLike = Union[str, Path]
+
+def read_calendar_csv(csv_path: PathLike) -> pd.DataFrame:
+    """Read and clean a daily Bazi calendar CSV."""
+    df = pd.read_csv(csv_path)
+
+    # Clean any potential whitespace in column names and data
+    df.columns = df.columns.str.strip()
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = df[col].str.strip()
+
+    try:
+        df['Date'] = pd.to_datetime(df['Date'], format='%a %m/%d/%Y')
+    except ValueError:
+        df['Date'] = pd.to_datetime(df['Date'])
+    return df
+
+def _pillar_codes(names: pd.Series) -> np.ndarray:
+    """Sexagenary indices for a column of pinyin pillar names (-1 if unknown)."""
+    return names.map(_PILLAR_CODES).fillna(-1).to_numpy(dtype=np.int16)
+
+def _write(out_path: PathLike, start_day: int, columns: Dict[str, np.ndarray], source: int = 0) -> Path:
+    """Write columns to a compiled calendar file via a uniquely named temporary file."""
+    out_path = Path(out_path)
+    count = len(columns['day_stem'])
+    header = np.array([(MAGIC, source, start_day, count)], dtype=HEADER_DTYPE)
+
+    fd, tmp_name = tempfile.mkstemp(dir=out_path.parent, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header.tobytes())
+            for name in COLUMNS:
+                f.write(np.asarray(columns[name], dtype=np.int8).tobytes())
+        os.replace(tmp_name, out_path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    return out_path
+
+def _split_pillars(indices: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Split sexagenary indices into stem and branch code columns."""
+    columns = {}
+    for pillar in ('year', 'month', 'day'):
+        index = np.asarray(indices[pillar], dtype=np.int16)
+        unknown = index < 0
+        columns[f'{pillar}_stem'] = np.where(unknown, -1, index % 10)
+        columns[f'{pillar}_branch'] = np.where(unknown, -1, index % 12)
+    return columns
+
+def compile_calendar(csv_path: PathLike, out_path: Optional[PathLike] = None) -> Path:
+    """
+    Compile a calendar CSV into the binary store.
+    Args:
+        csv_path: Source CSV with Date, pillar and Day Officer columns
+        out_path: Destination file (defaults to the CSV path with a .cal suffix)
+    """
+    csv_path = Path(csv_path)
+    out_path = Path(out_path) if out_path else csv_path.with_suffix(COMPILED_SUFFIX)
+    df = read_calendar_csv(csv_path)
+
+    days = df['Date'].values.astype('datetime64[D]').astype(np.int64)
+    start_day = int(days.min())
+    rows = days - start_day
+    count = int(rows.max()) + 1
+
+    # Dense columns indexed by day offset; days absent from the CSV stay -1
+    indices = {}
+    for pillar, column in (('year', 'Year Pillar'), ('month', 'Month Pillar'), ('day', 'Day Pillar')):
+        indices[pillar] = np.full(count, -1, dtype=np.int16)
+        indices[pillar][rows] = _pillar_codes(df[column])
+    columns = _split_pillars(indices)
+    columns['officer'] = np.full(count, -1, dtype=np.int16)
+    if 'Day Officer' in df.columns:
+        columns['officer'][rows] = df['Day Officer'].map(_OFFICER_CODES).fillna(-1).to_numpy(dtype=np.int16)
+
+    return _write(out_path, start_day, columns, source=csv_path.stat().st_mtime_ns)
+
+def generate_calendar(out_path: PathLike, start_year: int = MIN_YEAR, end_year: int = MAX_YEAR) -> Path:
+    """Generate a compiled calendar for a span of years from the pillar engine."""
+    dates = np.arange(np.datetime64(f'{start_year}-01-01'), np.datetime64(f'{end_year + 1}-01-01'))
+    pillars = get_pillars_array(dates)
+    columns = _split_pillars(pillars)
+    columns['officer'] = pillars['officer']
+    return _write(out_path, int(dates[0].astype(np.int64)), columns)
+
+def verify_officers(csv_path: PathLike) -> pd.DataFrame:
+    """
+    Compare a calendar CSV's Day Officer column with computed officers.
+
+    The officers are derived from the CSV's own month and day branches, so
+    this checks the officer rule independently of the pillar engine.
+    Returns:
+        The CSV rows whose Day Officer differs, with a 'Computed Officer' column
+    """
+    df = read_calendar_csv(csv_path)
+    month_branches = _pillar_codes(df['Month Pillar']) % 12
+    day_branches = _pillar_codes(df['Day Pillar']) % 12
+    computed = np.array(DAY_OFFICERS)[day_officer_codes(month_branches, day_branches)]
+
+    differs = computed != df['Day Officer'].to_numpy()
+    mismatches = df[differs].copy()
+    mismatches['Computed Officer'] = computed[differs]
+    return mismatches
+
+class CalendarStore:
+    def __init__(self, path: PathLike):
+        """Memory-map a compiled calendar file."""
+        self.path = Path(path)
+        header = np.fromfile(self.path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header['magic'][0] != MAGIC:
+            raise ValueError(f"{self.path} is not a compiled calendar file")
+
+        self.source_mtime_ns = int(header['source'][0])
+        self.start_day = int(header['start_day'][0])
+        self.count = int(header['count'][0])
+        data = np.memmap(self.path, dtype=np.int8, mode='r',
+                         offset=HEADER_DTYPE.itemsize, shape=(len(COLUMNS), self.count))
+        self.columns = {name: data[i] for i, name in enumerate(COLUMNS)}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, day: DateLike) -> bool:
+        return self._offset(day) >= 0
+
+    def _offset(self, day: DateLike) -> int:
+        """Row offset for a date, or -1 if the store has no data for it."""
+        offset = day_number(day) - self.start_day
+        if offset < 0 or offset >= self.count or self.columns['day_stem'][offset] < 0:
+            return -1
+        return offset
+
+    def _row(self, offset: int) -> Dict[str, Any]:
+        """Decode one row into the daily Bazi CSV column layout."""
+        row = {'Date': np.datetime64(self.start_day + offset, 'D').astype(object)}
+        for pillar in ('Day', 'Month', 'Year'):
+            stem = int(self.columns[f'{pillar.lower()}_stem'][offset])
+            branch = int(self.columns[f'{pillar.lower()}_branch'][offset])
+            if stem < 0 or branch < 0:
+                row[f'{pillar} Pillar'] = row[f'{pillar} Pillar English'] = None
+                continue
+            index = pillar_index(stem, branch)
+            row[f'{pillar} Pillar'] = PILLAR_CHINESE[index]
+            row[f'{pillar} Pillar English'] = PILLAR_ENGLISH[index]
+        officer = int(self.columns['officer'][offset])
+        row['Day Officer'] = DAY_OFFICERS[officer] if officer >= 0 else None
+        return row
+
+    def get(self, day: DateLike) -> Optional[Dict[str, Any]]:
+        """Get the row for a date as a dictionary, or None if it is missing."""
+        offset = self._offset(day)
+        return self._row(offset) if offset >= 0 else None
+
+    def get_range(self, start: DateLike, end: DateLike) -> List[Dict[str, Any]]:
+        """Get the rows for all dates from start to end inclusive, in date order."""
+        first = max(day_number(start) - self.start_day, 0)
+        last = min(day_number(end) - self.start_day + 1, self.count)
+        return [self._row(offset) for offset in range(first, last)
+                if self.columns['day_stem'][offset] >= 0]
+
+def load_calendar(csv_path: PathLike, compiled_path: Optional[PathLike] = None) -> CalendarStore:
+    """
+    Open the compiled store for a calendar CSV, recompiling it only when the
+    CSV has changed since the store was built.
+    """
+    csv_path = Path(csv_path)
+    compiled_path = Path(compiled_path) if compiled_path else csv_path.with_suffix(COMPILED_SUFFIX)
+    try:
+        store = CalendarStore(compiled_path)
+        if store.source_mtime_ns == csv_path.stat().st_mtime_ns:
+            return store
+    except (OSError, ValueError):
+        pass
+    compile_calendar(csv_path, compiled_path)
+    return CalendarStore(compiled_path)
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 3 and sys.argv[1] == 'build':
+        print(f"Wrote {compile_calendar(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)}")
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'generate':
+        print(f"Wrote {generate_calendar(sys.argv[2])}")
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'verify':
+        mismatches = verify_officers(sys.argv[2])
+        print(f"{len(mismatches)} Day Officer mismatches")
+        if len(mismatches):
+            print(mismatches[['Date', 'Day Officer', 'Computed Officer']].to_string(index=False))
+            sys.exit(1)
+    else:
+        print("Usage: python -m src.bazi.calendar_store build <calendar.csv> [output.cal]\n"
+              "       python -m src.bazi.calendar_store generate <output.cal>\n"
+              "       python -m src.bazi.calendar_store verify <calendar.csv>")
@@ -0,0 +1,148 @@
+"""
+Four-pillar chart builder for saved profiles.
+"""
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pytz
+
+from src.bazi.pillar import Pillar
+from src.bazi.sexagenary import (
+    PILLAR_CHINESE, PILLAR_ENGLISH, day_indices, get_year_month_at, pillar_index
+)
+from src.bazi.solar_terms import BOUNDARY_MARGIN_MINUTES, minutes_to_nearest_term
+from src.utils.date_utils import parse_date
+
+# Formats stored by main.py ("Apr 22, 1994" / "06:00 AM"); app.py stores dates
+# in any format accepted by date_utils.parse_date and 24-hour times
+BIRTH_DATE_FORMATS = ("%b %d, %Y", "%B %d, %Y")
+BIRTH_TIME_FORMATS = ("%H:%M", "%I:%M %p", "%H:%M:%S")
+
+PILLARS = ('year', 'month', 'day', 'hour')
+
+_UTC_OFFSET_PATTERN = re.compile(r'^(?:UTC|GMT)\s*([+-])(\d{1,2})(?::?(\d{2}))?$')
+
+def _parse_with(value: str, formats: Tuple[str, ...], label: str) -> datetime:
+    """Parse a string with the first matching format."""
+    for fmt in formats:
+        try:
+            return datetime.strptime(value.strip(), fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised birth {label}: {value!r}")
+
+@lru_cache(maxsize=None)
+def _fixed_offset_minutes(timezone_str: str) -> Optional[int]:
+    """Offset in minutes for 'UTC+05:30' style strings, None for zone names."""
+    match = _UTC_OFFSET_PATTERN.match(timezone_str.strip())
+    if not match:
+        return None
+    sign, hours, minutes = match.groups()
+    offset = int(hours) * 60 + int(minutes or 0)
+    return -offset if sign == '-' else offset
+
+def utc_offset_minutes(local: datetime, timezone_str: str) -> int:
+    """UTC offset in minutes for a local birth time in the given timezone."""
+    offset = _fixed_offset_minutes(timezone_str)
+    if offset is not None:
+        return offset
+    try:
+        zone = pytz.timezone(timezone_str)
+    except pytz.UnknownTimeZoneError:
+        raise ValueError(f"Unrecognised timezone: {timezone_str!r}")
+    return int(zone.localize(local, is_dst=False).utcoffset().total_seconds() // 60)
+
+def parse_birth_moment(birth_date: str, birth_time: str, timezone_str: str) -> Tuple[datetime, int]:
+    """
+    Parse stored profile fields into a naive local datetime and UTC offset.
+    Returns: (local_datetime, utc_offset_minutes)
+    """
+    day = parse_date(birth_date.strip()) or _parse_with(birth_date, BIRTH_DATE_FORMATS, "date")
+    clock = _parse_with(birth_time, BIRTH_TIME_FORMATS, "time")
+    local = day.replace(hour=clock.hour, minute=clock.minute)
+    return local, utc_offset_minutes(local, timezone_str)
+
+class ChartBuilder:
+    def __init__(self, zi_hour_starts_day: bool = True):
+        """
+        Args:
+            zi_hour_starts_day: Treat births from 23:00 as the next day, since
+                the Zi hour (23:00-01:00) opens the new sexagenary day
+        """
+        self.zi_hour_starts_day = zi_hour_starts_day
+
+    def _compute(self, local_minutes: np.ndarray, utc_minutes: np.ndarray) -> Dict[str, np.ndarray]:
+        """Compute the four pillars from local and UTC minute timestamps."""
+        local_days, minute_of_day = np.divmod(local_minutes, 1440)
+        hours = minute_of_day // 60
+
+        if self.zi_hour_starts_day:
+            local_days = local_days + (hours >= 23)
+        day_index = day_indices(local_days)
+
+        # Year and month compare the exact birth instant with the solar terms
+        year_index, month_index = get_year_month_at(utc_minutes)
+
+        # Hour branch: Zi covers 23:00-01:00; the stem follows the day stem
+        hour_branch = ((hours + 1) // 2) % 12
+        hour_stem = (2 * (day_index % 10 % 5) + hour_branch) % 10
+        hour_index = pillar_index(hour_stem, hour_branch)
+
+        # Flag births too close to a solar term for the table's accuracy
+        distance = minutes_to_nearest_term(utc_minutes)
+
+        return {
+            'year': year_index.astype(np.int8),
+            'month': month_index.astype(np.int8),
+            'day': day_index.astype(np.int8),
+            'hour': hour_index.astype(np.int8),
+            'near_term_boundary': distance <= BOUNDARY_MARGIN_MINUTES,
+        }
+
+    def build(self, birth_date: str, birth_time: str, timezone: str) -> Dict[str, Any]:
+        """
+        Build a full four-pillar chart from stored profile fields.
+        Returns:
+            Dictionary with pinyin and English names for each pillar, the
+            sexagenary indices, the Day Master and a near_term_boundary flag
+        """
+        local, offset = parse_birth_moment(birth_date, birth_time, timezone)
+        local_minutes = int((local - datetime(1970, 1, 1)) // timedelta(minutes=1))
+        pillars = self._compute(np.array([local_minutes]), np.array([local_minutes - offset]))
+        return chart_from_batch(pillars, 0)
+
+    def build_batch(self, profiles: Iterable[Dict[str, str]]) -> Dict[str, np.ndarray]:
+        """
+        Build charts for many profiles in one vectorized pass.
+        Args:
+            profiles: Dicts with 'birth_date', 'birth_time' and 'timezone'
+        Returns:
+            Dictionary of int8 sexagenary index arrays keyed by pillar name,
+            plus a boolean 'near_term_boundary' array
+        """
+        local_times = []
+        offsets = []
+        for profile in profiles:
+            local, offset = parse_birth_moment(
+                profile['birth_date'], profile['birth_time'], profile['timezone']
+            )
+            local_times.append(local)
+            offsets.append(offset)
+
+        local_minutes = np.array(local_times, dtype='datetime64[m]').astype(np.int64)
+        return self._compute(local_minutes, local_minutes - np.array(offsets, dtype=np.int64))
+
+def chart_from_batch(pillars: Dict[str, np.ndarray], row: int) -> Dict[str, Any]:
+    """Chart dictionary (as returned by ChartBuilder.build) for one row of a batch."""
+    chart = {}
+    for name in PILLARS:
+        index = int(pillars[name][row])
+        chart[f'{name}_pillar'] = PILLAR_ENGLISH[index]
+        chart[f'{name}_pillar_chinese'] = PILLAR_CHINESE[index]
+    chart['day_master'] = Pillar(int(pillars['day'][row])).stem.english
+    chart['pillar_indices'] = [int(pillars[name][row]) for name in PILLARS]
+    chart['near_term_boundary'] = bool(pillars['near_term_boundary'][row])
+    return chart
@@ -0,0 +1,114 @@
+"""
+Token-budgeted chat history for prompts.
+
+Turns are rendered once, when they are added, into a running buffer that
+is extended and trimmed in place rather than rebuilt every request. When
+the recent turns exceed the token budget the oldest are condensed into a
+one-line note each, and the oldest notes are dropped once they exceed
+their own share of the budget, so prompt size stays bounded however long
+the conversation runs.
+"""
+import math
+import re
+import threading
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+# Tokens of history allowed in each prompt
+HISTORY_TOKEN_BUDGET = 1500
+
+# Share of the budget kept for condensed notes on older turns
+CONDENSED_SHARE = 0.2
+
+# Characters kept from each side of a condensed turn
+CONDENSED_CHARS = 100
+
+# Rough characters per token for English text; avoids a tokenizer round trip
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def _clip(text: str, limit: int = CONDENSED_CHARS) -> str:
+    """First sentence of text, cut to limit characters."""
+    text = " ".join(text.split())
+    text = _SENTENCE_END.split(text, 1)[0]
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+# (rendered line(s) with trailing newline, token estimate)
+_Entry = Tuple[str, int]
+
+class _Buffer:
+    def __init__(self):
+        """Rendered entries plus their concatenation, kept in step as entries come and go."""
+        self.entries: Deque[_Entry] = deque()
+        self.text = ''
+        self.tokens = 0
+
+    def append(self, text: str) -> None:
+        tokens = estimate_tokens(text)
+        self.entries.append((text, tokens))
+        self.text += text
+        self.tokens += tokens
+
+    def popleft(self) -> str:
+        text, tokens = self.entries.popleft()
+        self.text = self.text[len(text):]
+        self.tokens -= tokens
+        return text
+
+class ChatHistoryWindow:
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET, condensed_share: float = CONDENSED_SHARE):
+        """Recent turns in full and older turns condensed, within token_budget."""
+        self.token_budget = token_budget
+        self.condensed_budget = int(token_budget * condensed_share)
+        self._recent = _Buffer()
+        self._condensed = _Buffer()
+        # Full (user, ai) pairs matching the entries of _recent, for condensing
+        self._turns: Deque[Tuple[str, str]] = deque()
+        self._stats = {'turns': 0, 'condensed': 0, 'dropped': 0}
+        self._lock = threading.Lock()
+
+    def add_turn(self, user: str, ai: str) -> None:
+        """Append a completed exchange, condensing or dropping old turns to stay in budget."""
+        with self._lock:
+            self._recent.append(f"User: {user}\nAI: {ai}\n")
+            self._turns.append((user, ai))
+            self._stats['turns'] += 1
+            # Keep the latest turn in full even if it alone is over budget
+            while self._recent.tokens + self._condensed.tokens > self.token_budget and len(self._turns) > 1:
+                self._recent.popleft()
+                old_user, old_ai = self._turns.popleft()
+                self._condensed.append(f"- User asked: {_clip(old_user)} AI said: {_clip(old_ai)}\n")
+                self._stats['condensed'] += 1
+                while self._condensed.tokens > self.condensed_budget and self._condensed.entries:
+                    self._condensed.popleft()
+                    self._stats['dropped'] += 1
+
+    @property
+    def text(self) -> str:
+        """History for the prompt: condensed notes on older turns, then recent turns in full."""
+        with self._lock:
+            if not self._condensed.entries:
+                return self._recent.text
+            return f"Earlier in the conversation:\n{self._condensed.text}\n{self._recent.text}"
+
+    @property
+    def tokens(self) -> int:
+        with self._lock:
+            return self._recent.tokens + self._condensed.tokens
+
+    def stats(self) -> Dict[str, int]:
+        """Turns added, condensed and dropped, with the turns in full and the current token estimate."""
+        with self._lock:
+            return dict(self._stats, recent=len(self._turns),
+                        tokens=self._recent.tokens + self._condensed.tokens)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._recent = _Buffer()
+            self._condensed = _Buffer()
+            self._turns.clear()
@@ -0,0 +1,138 @@
+"""
+Pairwise profile compatibility.
+
+Every profile's chart is encoded as pillar index arrays, and the N x N score
+matrix is built from small lookup tables with a few matrix products, so a
+whole directory of profiles is compared without any LLM calls.
+
+Run from the command line with::
+
+    python -m src.bazi.compatibility user_profiles [name] [k]
+"""
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.bazi.chart import PILLARS, ChartBuilder
+from src.bazi.elements import RELATIONSHIP_MATRIX, STEM_ELEMENT_CODES
+from src.bazi.interactions import CLASH, COMBINATION, HARMONY, INTERACTION_MASKS, PUNISHMENT
+from src.bazi.profile_store import open_profile_store
+from src.bazi.scoring import score_charts
+
+# Score of the relationship between two Day Master elements, by relationship
+# code (same, produces, controls, controlled_by, produced_by). Symmetric, as
+# produces/produced_by and controls/controlled_by score alike.
+DAY_MASTER_SCORES = np.array([1.0, 2.0, -1.0, -1.0, 2.0], dtype=np.float32)
+
+# Bonus when the two Day Masters form a stem combination (Jia-Ji, Yi-Geng, ...)
+STEM_COMBINATION_BONUS = 3.0
+
+# Score per pair of branches across the two charts, by interaction
+BRANCH_INTERACTION_SCORES = {COMBINATION: 1.0, HARMONY: 0.5, CLASH: -1.0, PUNISHMENT: -0.5}
+
+# Scale of the element complement term (how well each chart fills the
+# other's missing elements)
+ELEMENT_COMPLEMENT_WEIGHT = 10.0
+
+def _branch_score_table() -> np.ndarray:
+    """(12, 12) score for each pair of branches."""
+    bits = 1 << np.arange(12)
+    table = np.zeros((12, 12), dtype=np.float32)
+    for interaction, score in BRANCH_INTERACTION_SCORES.items():
+        table += score * ((INTERACTION_MASKS[interaction][:, None] & bits[None, :]) != 0)
+    return table
+
+BRANCH_SCORE_TABLE = _branch_score_table()
+
+def encode_profiles(profiles: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """
+    Encode profiles as an (N, 4) array of pillar indices.
+
+    Stored charts are used as they are; profiles saved without one are built
+    in a single batch from their birth details.
+    """
+    indices = np.zeros((len(profiles), len(PILLARS)), dtype=np.int16)
+    missing = []
+    for row, profile in enumerate(profiles):
+        chart = profile.get('bazi_chart')
+        if chart and 'pillar_indices' in chart:
+            indices[row] = chart['pillar_indices']
+        else:
+            missing.append(row)
+    if missing:
+        built = ChartBuilder().build_batch([profiles[row] for row in missing])
+        indices[missing] = np.stack([built[pillar] for pillar in PILLARS], axis=1)
+    return indices
+
+def compatibility_components(indices: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Compute each part of the compatibility score for every pair of charts.
+    Args:
+        indices: (N, 4) array of pillar indices in year, month, day, hour order
+    Returns:
+        Dictionary of (N, N) float32 matrices: 'day_master', 'branches',
+        'elements' and their sum 'total'. Diagonals are left as computed.
+    """
+    indices = np.asarray(indices, dtype=np.int16).reshape(-1, len(PILLARS))
+    day_masters = indices[:, 2] % 10
+
+    # Day Master element relationship, plus the stem combination bonus
+    dm_elements = STEM_ELEMENT_CODES[day_masters]
+    day_master = DAY_MASTER_SCORES[RELATIONSHIP_MATRIX[dm_elements[:, None], dm_elements[None, :]]]
+    day_master += STEM_COMBINATION_BONUS * (np.abs(day_masters[:, None] - day_masters[None, :]) == 5)
+
+    # Branch interactions across all 4 x 4 branch pairs: counts @ table @ counts.T
+    counts = np.zeros((len(indices), 12), dtype=np.float32)
+    np.add.at(counts, (np.arange(len(indices))[:, None], indices % 12), 1)
+    branches = counts @ BRANCH_SCORE_TABLE @ counts.T
+
+    # Element complement: each chart's shortfall against an even share,
+    # weighted by how much of that element the other chart carries
+    balance = score_charts(indices)['balance']
+    shares = balance / balance.sum(axis=1, keepdims=True)
+    deficits = np.maximum(0.2 - shares, 0)
+    complement = deficits @ shares.T
+    elements = ELEMENT_COMPLEMENT_WEIGHT * (complement + complement.T)
+
+    total = day_master + branches + elements
+    return {
+        'day_master': day_master.astype(np.float32),
+        'branches': branches.astype(np.float32),
+        'elements': elements.astype(np.float32),
+        'total': total.astype(np.float32),
+    }
+
+def compatibility_matrix(indices: np.ndarray) -> np.ndarray:
+    """(N, N) compatibility scores for an (N, 4) array of pillar indices."""
+    return compatibility_components(indices)['total']
+
+def top_matches(matrix: np.ndarray, row: int, k: int = 5) -> List[int]:
+    """Indices of the k best matches for one profile, best first, excluding itself."""
+    scores = np.array(matrix[row], dtype=np.float32)
+    scores[row] = -np.inf
+    k = min(k, len(scores) - 1)
+    if k <= 0:
+        return []
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return [int(i) for i in candidates[np.argsort(-scores[candidates], kind='stable')]]
+
+def load_profiles(profiles_dir: str, backend: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Load every profile in a directory's profile store that has birth details or a chart."""
+    return [
+        profile for profile in open_profile_store(profiles_dir, backend).iter_profiles()
+        if 'bazi_chart' in profile or 'birth_date' in profile
+    ]
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python -m src.bazi.compatibility <profiles_dir> [name] [k]")
+        sys.exit(1)
+    profiles = load_profiles(sys.argv[1])
+    matrix = compatibility_matrix(encode_profiles(profiles))
+    names = [profile.get('name', '?') for profile in profiles]
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    rows = [names.index(sys.argv[2])] if len(sys.argv) > 2 else range(len(profiles))
+    for row in rows:
+        matches = ", ".join(f"{names[i]} ({matrix[row, i]:.1f})" for i in top_matches(matrix, row, k))
+        print(f"{names[row]}: {matches}")
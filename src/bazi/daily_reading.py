@@ -5,11 +5,15 @@ import pandas as pd
 from datetime import datetime
 from typing import Dict, Optional, Any
 
+from src.bazi.calendar_index import CalendarIndex
+from src.bazi.sexagenary import get_pillars
+
 class DailyBaziReader:
     def __init__(self, data_file: str):
         """Initialize with path to BAZI data CSV file."""
         self.data_file = data_file
         self.daily_bazi_df = None
+        self.calendar_index = None
         self.load_data()
     
     def load_data(self) -> None:
@@ -18,9 +22,11 @@ class DailyBaziReader:
             self.daily_bazi_df = pd.read_csv(self.data_file)
             # Convert date column to datetime
             self.daily_bazi_df['Date'] = pd.to_datetime(self.daily_bazi_df['Date'])
+            self.calendar_index = CalendarIndex(self.daily_bazi_df)
         except Exception as e:
             print(f"Error loading daily BAZI data: {str(e)}")
             self.daily_bazi_df = None
+            self.calendar_index = None
     
     def get_daily_reading(self, date: str) -> Optional[Dict[str, Any]]:
         """
@@ -30,17 +36,22 @@ class DailyBaziReader:
         Returns:
             Dictionary containing BAZI reading data
         """
-        if self.daily_bazi_df is None:
-            return None
-            
         try:
             target_date = pd.to_datetime(date)
-            daily_data = self.daily_bazi_df[self.daily_bazi_df['Date'] == target_date]
+            reading = get_pillars(target_date.date())
             
-            if daily_data.empty:
-                return None
+            # Pillars come from the calendar engine; the data file only adds
+            # the columns it does not compute and may override the Day Officer
+            if self.calendar_index is not None:
+                extra = self.calendar_index.get(target_date)
+                if extra is not None:
+                    for column, value in extra.items():
+                        if column not in reading:
+                            reading[column] = value
+                    if extra.get('Day Officer'):
+                        reading['Day Officer'] = extra['Day Officer']
                 
-            return daily_data.iloc[0].to_dict()
+            return reading
         except Exception as e:
             print(f"Error getting daily reading: {str(e)}")
             return None
@@ -54,9 +65,9 @@ class DailyBaziReader:
         Date: {bazi_data['Date']}
         
         Pillars:
-        - Year: {bazi_data['Year Pillar Chinese']} ({bazi_data['Year Pillar English']})
-        - Month: {bazi_data['Month Pillar Chinese']} ({bazi_data['Month Pillar English']})
-        - Day: {bazi_data['Day Pillar Chinese']} ({bazi_data['Day Pillar English']})
+        - Year: {bazi_data['Year Pillar']} ({bazi_data['Year Pillar English']})
+        - Month: {bazi_data['Month Pillar']} ({bazi_data['Month Pillar English']})
+        - Day: {bazi_data['Day Pillar']} ({bazi_data['Day Pillar English']})
         
-        Day Officer: {bazi_data['Day Officer']}
+        Day Officer: {bazi_data.get('Day Officer', 'Unknown')}
         """
@@ -0,0 +1,122 @@
+"""
+Auspicious day finder.
+
+Scans a date range for days that suit a profile's Day Master, using the
+vectorized pillar engine so multi-year searches run in one pass.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.bazi.elements import (
+    BRANCH_ELEMENT_CODES, STEM_ELEMENT_CODES, STEM_ELEMENTS, relationship_codes
+)
+from src.bazi.interactions import CLASH, INTERACTION_MASKS, branch_mask
+from src.bazi.sexagenary import (
+    DAY_OFFICERS, PILLAR_CHINESE, PILLAR_ENGLISH, DateLike, as_date, get_pillars_array
+)
+
+# Day Master-centred names for the canonical relationship codes in
+# src.bazi.elements (Day Master first, day element second)
+RELATIONSHIPS = ('Companion', 'Output', 'Wealth', 'Power', 'Resource')
+
+RELATIONSHIP_DESCRIPTIONS = {
+    'Companion': 'Same element as your Day Master - peer support',
+    'Output': 'Your Day Master produces the day element - expression and creativity',
+    'Wealth': 'Your Day Master controls the day element - opportunity and gain',
+    'Power': 'The day element controls your Day Master - pressure and discipline',
+    'Resource': 'The day element produces your Day Master - support and nourishment',
+}
+
+OFFICER_SCORES = {
+    'Success': 3, 'Open': 3, 'Establish': 2, 'Full': 2, 'Stable': 2,
+    'Initiate': 1, 'Remove': 1, 'Balance': 1, 'Receive': 1,
+    'Close': 0, 'Danger': -2, 'Destruction': -3,
+}
+
+RELATIONSHIP_SCORES = {'Resource': 2, 'Companion': 1, 'Wealth': 1, 'Output': 0, 'Power': -1}
+
+_OFFICER_SCORE_TABLE = np.array([OFFICER_SCORES[name] for name in DAY_OFFICERS], dtype=np.float32)
+_RELATIONSHIP_SCORE_TABLE = np.array([RELATIONSHIP_SCORES[name] for name in RELATIONSHIPS], dtype=np.float32)
+
+def find_auspicious_days(
+    day_master_stem: int,
+    start: DateLike,
+    end: DateLike,
+    officers: Optional[Iterable[str]] = None,
+    relationships: Optional[Iterable[str]] = None,
+    avoid_clashes_with: Optional[Iterable[int]] = None,
+    limit: Optional[int] = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Find and rank days in a date range that suit a Day Master.
+    Args:
+        day_master_stem: Stem code (0-9) of the profile's Day Master
+        start: First date to scan
+        end: Last date to scan (inclusive)
+        officers: Allowed Day Officer names (any if None)
+        relationships: Required relationships between the day stem's element
+            and the Day Master, from RELATIONSHIPS (any if None)
+        avoid_clashes_with: Branch codes (e.g. the profile's pillar branches)
+            whose clashing branch the day must not fall on
+        limit: Maximum number of results (all if None)
+    Returns:
+        Matching days ordered by score (best first), then by date
+    """
+    dates = np.arange(np.datetime64(as_date(start), 'D'), np.datetime64(as_date(end), 'D') + 1)
+    if len(dates) == 0:
+        return []
+    pillars = get_pillars_array(dates)
+    day_stems = pillars['day'] % 10
+    day_branches = pillars['day'] % 12
+    officer_codes = pillars['officer']
+
+    day_master_element = STEM_ELEMENTS[day_master_stem]
+    stem_relation = relationship_codes(day_master_element, STEM_ELEMENT_CODES[day_stems])
+    branch_relation = relationship_codes(day_master_element, BRANCH_ELEMENT_CODES[day_branches])
+
+    keep = np.ones(len(dates), dtype=bool)
+    if officers is not None:
+        allowed = [DAY_OFFICERS.index(name) for name in officers]
+        keep &= np.isin(officer_codes, allowed)
+    if relationships is not None:
+        required = [RELATIONSHIPS.index(name) for name in relationships]
+        keep &= np.isin(stem_relation, required)
+    if avoid_clashes_with is not None:
+        keep &= (INTERACTION_MASKS[CLASH][day_branches] & branch_mask(avoid_clashes_with)) == 0
+
+    scores = (_OFFICER_SCORE_TABLE[officer_codes]
+              + _RELATIONSHIP_SCORE_TABLE[stem_relation]
+              + 0.5 * _RELATIONSHIP_SCORE_TABLE[branch_relation])
+
+    matches = np.flatnonzero(keep)
+    # Stable sort on descending score keeps ties in date order
+    matches = matches[np.argsort(-scores[matches], kind='stable')]
+    if limit is not None:
+        matches = matches[:limit]
+
+    return [
+        {
+            'date': str(dates[i]),
+            'day_pillar': PILLAR_CHINESE[pillars['day'][i]],
+            'day_pillar_english': PILLAR_ENGLISH[pillars['day'][i]],
+            'day_officer': DAY_OFFICERS[officer_codes[i]],
+            'relationship': RELATIONSHIPS[stem_relation[i]],
+            'score': float(scores[i]),
+        }
+        for i in matches
+    ]
+
+def find_days_for_chart(chart: Dict[str, Any], start: DateLike, end: DateLike,
+                        avoid_clashes: bool = True, **filters) -> List[Dict[str, Any]]:
+    """
+    Find auspicious days for a chart built by ChartBuilder.
+    Args:
+        chart: Chart dictionary with 'pillar_indices' (year, month, day, hour)
+        avoid_clashes: Skip days whose branch clashes with any chart branch
+        **filters: Passed through to find_auspicious_days
+    """
+    indices = chart['pillar_indices']
+    if avoid_clashes:
+        filters['avoid_clashes_with'] = [index % 12 for index in indices]
+    return find_auspicious_days(indices[2] % 10, start, end, **filters)
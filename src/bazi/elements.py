@@ -1,45 +1,97 @@
 """
 BAZI elements analysis and relationships module.
 """
-from typing import Dict, Tuple
+from typing import Dict, Optional
+
+import numpy as np
+
+# The five elements, ten Heavenly Stems and twelve Earthly Branches. Codes are
+# the tuple positions, so a stem or branch can be carried around as a small int.
+ELEMENTS = ('Wood', 'Fire', 'Earth', 'Metal', 'Water')
+
+STEMS = ('Jia', 'Yi', 'Bing', 'Ding', 'Wu', 'Ji', 'Geng', 'Xin', 'Ren', 'Gui')
+
+BRANCHES = ('Zi', 'Chou', 'Yin', 'Mao', 'Chen', 'Si',
+            'Wu', 'Wei', 'Shen', 'You', 'Xu', 'Hai')
+
+BRANCH_ANIMALS = ('Rat', 'Ox', 'Tiger', 'Rabbit', 'Dragon', 'Snake',
+                  'Horse', 'Goat', 'Monkey', 'Rooster', 'Dog', 'Pig')
+
+# Element code of each stem (pairs of Yang/Yin stems share an element)
+STEM_ELEMENTS = (0, 0, 1, 1, 2, 2, 3, 3, 4, 4)
+
+# Element code of each branch's main qi
+BRANCH_ELEMENTS = (4, 2, 0, 0, 2, 1, 1, 2, 3, 3, 2, 4)
+
+def stem_polarity(stem: int) -> str:
+    """Return 'Yang' for even stem codes and 'Yin' for odd ones."""
+    return 'Yang' if stem % 2 == 0 else 'Yin'
+
+# Relationship codes between two elements, read from the first element's
+# point of view. The code is (second - first) % 5 along the productive cycle
+# Wood -> Fire -> Earth -> Metal -> Water, so it can also be computed directly.
+SAME, PRODUCES, CONTROLS, CONTROLLED_BY, PRODUCED_BY = range(5)
+
+RELATIONSHIP_NAMES = ('same', 'produces', 'controls', 'controlled_by', 'produced_by')
+
+RELATIONSHIP_MATRIX = np.array(
+    [[(second - first) % 5 for second in range(5)] for first in range(5)], dtype=np.int8
+)
+
+STEM_ELEMENT_CODES = np.array(STEM_ELEMENTS, dtype=np.int8)
+BRANCH_ELEMENT_CODES = np.array(BRANCH_ELEMENTS, dtype=np.int8)
+
+_RELATIONSHIP_TEMPLATES = (
+    '{0} and {1} share the same element - Similar energies support each other',
+    '{0} produces {1} - This is a productive and favorable relationship',
+    '{0} controls {1} - This suggests influence and regulation',
+    '{1} controls {0} - This may indicate some challenges',
+    '{0} is produced by {1} - This indicates support and nurturing',
+)
+
+# Rendered description for every ordered pair of element codes
+RELATIONSHIP_TEXT = tuple(
+    tuple(
+        _RELATIONSHIP_TEMPLATES[RELATIONSHIP_MATRIX[first, second]].format(ELEMENTS[first], ELEMENTS[second])
+        for second in range(5)
+    )
+    for first in range(5)
+)
+
+_ELEMENT_CODES = {name: code for code, name in enumerate(ELEMENTS)}
+
+def element_code(name: str) -> Optional[int]:
+    """
+    Element code for an element name or any label containing one, such as
+    'Wood', 'Yang Wood' or 'Yin Metal Ox'. Returns None if no element is found.
+    """
+    code = _ELEMENT_CODES.get(name)
+    if code is not None:
+        return code
+    for word in name.split():
+        code = _ELEMENT_CODES.get(word)
+        if code is not None:
+            return code
+    return None
+
+def relationship_codes(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Classify arrays of element code pairs in one vectorized lookup.
+    Returns:
+        Array of relationship codes (positions in RELATIONSHIP_NAMES)
+    """
+    return RELATIONSHIP_MATRIX[np.asarray(first), np.asarray(second)]
 
 def get_element_relationship(element1: str, element2: str) -> str:
     """
     Analyze the relationship between two elements based on BAZI principles.
+    Accepts element names or labels containing them (e.g. 'Yang Wood').
     """
-    relationships = {
-        ('Wood', 'Wood'): 'Harmony - Similar energies support each other',
-        ('Wood', 'Fire'): 'Productive - Wood feeds Fire',
-        ('Wood', 'Earth'): 'Weakening - Wood depletes Earth',
-        ('Wood', 'Metal'): 'Destructive - Metal chops Wood',
-        ('Wood', 'Water'): 'Supportive - Water nourishes Wood',
-        
-        ('Fire', 'Wood'): 'Supported - Fire is fed by Wood',
-        ('Fire', 'Fire'): 'Harmony - Similar energies support each other',
-        ('Fire', 'Earth'): 'Productive - Fire creates Earth (ash)',
-        ('Fire', 'Metal'): 'Weakening - Fire melts Metal',
-        ('Fire', 'Water'): 'Destructive - Water extinguishes Fire',
-        
-        ('Earth', 'Wood'): 'Controlling - Earth contains Wood growth',
-        ('Earth', 'Fire'): 'Supported - Earth is created by Fire',
-        ('Earth', 'Earth'): 'Harmony - Similar energies support each other',
-        ('Earth', 'Metal'): 'Productive - Earth contains Metal',
-        ('Earth', 'Water'): 'Weakening - Water erodes Earth',
-        
-        ('Metal', 'Wood'): 'Productive - Metal tools help Wood growth',
-        ('Metal', 'Fire'): 'Controlling - Metal conducts Fire',
-        ('Metal', 'Earth'): 'Supported - Metal comes from Earth',
-        ('Metal', 'Metal'): 'Harmony - Similar energies support each other',
-        ('Metal', 'Water'): 'Productive - Metal holds Water',
-        
-        ('Water', 'Wood'): 'Productive - Water nourishes Wood',
-        ('Water', 'Fire'): 'Controlling - Water controls Fire',
-        ('Water', 'Earth'): 'Productive - Water nourishes Earth',
-        ('Water', 'Metal'): 'Supported - Water is held by Metal',
-        ('Water', 'Water'): 'Harmony - Similar energies support each other'
-    }
-    
-    return relationships.get((element1, element2), 'Unknown relationship')
+    first = element_code(element1)
+    second = element_code(element2)
+    if first is None or second is None:
+        return 'Unknown relationship'
+    return RELATIONSHIP_TEXT[first][second]
 
 def get_element_properties() -> Dict[str, Dict[str, str]]:
     """
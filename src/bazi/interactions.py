@@ -0,0 +1,127 @@
+"""
+Earthly Branch interactions.
+
+Clashes, six combinations, three harmonies and punishments are precomputed
+as 12-bit masks per branch (bit j set when the branch relates to branch j),
+so checking a chart's branches against a day is a few bitwise operations
+and a whole year of days is one vectorized pass.
+"""
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from src.bazi.chart import PILLARS
+from src.bazi.elements import BRANCHES, BRANCH_ANIMALS
+from src.bazi.sexagenary import get_pillars_array
+
+# Interaction codes; bit r of a scan result is set when interaction r applies
+CLASH, COMBINATION, HARMONY, PUNISHMENT = range(4)
+
+INTERACTIONS = ('Clash', 'Combination', 'Harmony', 'Punishment')
+
+INTERACTION_VERBS = ('clashes with', 'combines with', 'harmonizes with', 'punishes')
+
+# Three harmony groups share branch % 4: Shen-Zi-Chen (Water), Si-You-Chou
+# (Metal), Yin-Wu-Xu (Fire) and Hai-Mao-Wei (Wood)
+HARMONY_ELEMENTS = ('Water', 'Metal', 'Fire', 'Wood')
+
+_PUNISHMENT_GROUPS = ((2, 5, 8), (1, 10, 7), (0, 3))
+_SELF_PUNISHMENTS = (4, 6, 9, 11)
+
+def _build_masks() -> np.ndarray:
+    masks = np.zeros((4, 12), dtype=np.uint16)
+    for branch in range(12):
+        masks[CLASH, branch] = 1 << ((branch + 6) % 12)
+        masks[COMBINATION, branch] = 1 << ((1 - branch) % 12)
+        for other in range(branch % 4, 12, 4):
+            if other != branch:
+                masks[HARMONY, branch] |= 1 << other
+    for group in _PUNISHMENT_GROUPS:
+        for branch in group:
+            for other in group:
+                if other != branch:
+                    masks[PUNISHMENT, branch] |= 1 << other
+    for branch in _SELF_PUNISHMENTS:
+        masks[PUNISHMENT, branch] |= 1 << branch
+    return masks
+
+# INTERACTION_MASKS[interaction, branch] -> 12-bit mask of related branches
+INTERACTION_MASKS = _build_masks()
+
+def branch_mask(branches: Sequence[int]) -> int:
+    """12-bit mask with a bit set for each branch code."""
+    mask = 0
+    for branch in branches:
+        mask |= 1 << int(branch)
+    return mask
+
+def scan_interactions(chart_branches: Sequence[int], day_branches: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Evaluate a chart's branches against many day branches in one pass.
+    Args:
+        chart_branches: Branch codes of the chart pillars (year, month, day, hour)
+        day_branches: Array of day branch codes
+    Returns:
+        Dictionary of arrays:
+            'interactions': (N, len(chart_branches)) uint8, bit r set when
+                interaction r applies between the day and that pillar
+            'complete_harmony': (N,) bool, day completes a three harmony with the chart
+    """
+    day_branches = np.asarray(day_branches, dtype=np.int64)
+    chart_branches = np.asarray(chart_branches, dtype=np.int64)
+    masks = INTERACTION_MASKS[:, day_branches]            # (4, N)
+
+    hits = (masks[:, :, None] >> chart_branches[None, None, :]) & 1   # (4, N, P)
+    interactions = np.zeros(hits.shape[1:], dtype=np.uint8)
+    for code in range(len(INTERACTIONS)):
+        interactions |= (hits[code] << code).astype(np.uint8)
+
+    harmony = masks[HARMONY]
+    complete = (harmony & branch_mask(chart_branches)) == harmony
+    return {'interactions': interactions, 'complete_harmony': complete}
+
+def find_interactions(chart_indices: Sequence[int], day_branch: int) -> List[Dict[str, Any]]:
+    """
+    List the interactions between a day branch and a chart's pillar branches.
+    Args:
+        chart_indices: Sexagenary indices of the chart (year, month, day, hour)
+        day_branch: Branch code of the day
+    Returns:
+        One dictionary per interaction with 'interaction', 'pillar', 'branch'
+        and a readable 'description', plus a 'Harmony' entry for the full
+        trio when the day completes a three harmony
+    """
+    chart_branches = [int(index) % 12 for index in chart_indices]
+    scan = scan_interactions(chart_branches, np.array([day_branch]))
+    day = f"{BRANCHES[day_branch]} ({BRANCH_ANIMALS[day_branch]})"
+
+    found = []
+    for position, pillar in enumerate(PILLARS[:len(chart_branches)]):
+        bits = int(scan['interactions'][0, position])
+        branch = chart_branches[position]
+        for code, name in enumerate(INTERACTIONS):
+            if bits >> code & 1:
+                found.append({
+                    'interaction': name,
+                    'pillar': pillar,
+                    'branch': BRANCHES[branch],
+                    'description': f"Day branch {day} {INTERACTION_VERBS[code]} your "
+                                   f"{pillar} branch {BRANCHES[branch]} ({BRANCH_ANIMALS[branch]})",
+                })
+    if scan['complete_harmony'][0]:
+        found.append({
+            'interaction': 'Harmony',
+            'pillar': None,
+            'branch': None,
+            'description': f"Day branch {day} completes a {HARMONY_ELEMENTS[day_branch % 4]} "
+                           f"three harmony with your chart",
+        })
+    return found
+
+def count_interactions_for_year(chart_indices: Sequence[int], year: int) -> Dict[str, int]:
+    """Count the days in a year on which each interaction touches the chart."""
+    dates = np.arange(np.datetime64(f'{year}-01-01'), np.datetime64(f'{year + 1}-01-01'))
+    day_branches = get_pillars_array(dates)['day'] % 12
+    scan = scan_interactions([int(index) % 12 for index in chart_indices], day_branches)
+    any_pillar = np.bitwise_or.reduce(scan['interactions'], axis=1)
+    return {name: int(np.count_nonzero(any_pillar >> code & 1)) for code, name in enumerate(INTERACTIONS)}
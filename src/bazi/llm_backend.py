@@ -0,0 +1,264 @@
+"""
+Chat model backends and the process-wide request gate.
+
+Every chat request, sync or async and from any Streamlit session, passes
+through one ConcurrencyGate that caps the requests in flight and queues the
+rest in arrival order, failing those that wait too long. A deterministic
+FakeChatModel with configurable latency stands in for Gemini so concurrency
+and throughput can be exercised without network access.
+
+Run a throughput check against the fake model with::
+
+    python -m src.bazi.llm_backend bench [requests] [latency_seconds]
+"""
+import asyncio
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional
+
+from langchain_core.messages import AIMessageChunk
+
+# 'gemini' (default) or 'fake'
+LLM_BACKEND_ENV_VAR = 'BAZI_LLM_BACKEND'
+
+# Seconds before the first fake token, and between fake tokens
+FAKE_LATENCY_ENV_VAR = 'BAZI_FAKE_LLM_LATENCY'
+DEFAULT_FAKE_LATENCY = 0.5
+DEFAULT_FAKE_TOKEN_DELAY = 0.01
+
+# Requests allowed in flight across the process, and waiting behind them
+MAX_CONCURRENCY_ENV_VAR = 'BAZI_LLM_MAX_CONCURRENCY'
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_QUEUE = 64
+
+# Seconds a request may wait for a slot
+DEFAULT_QUEUE_TIMEOUT = 30.0
+
+_FAKE_SENTENCES = (
+    "Your Day Master responds well to steady, deliberate steps today.",
+    "The day's energy favours finishing what you have already started.",
+    "Supportive elements are present, so lean on trusted allies.",
+    "Keep commitments light and leave room to adapt.",
+    "This is a good moment to plan rather than to launch.",
+    "Expressive energy is strong; share ideas, but listen as well.",
+)
+
+class FakeChatModel:
+    def __init__(self, latency: float = DEFAULT_FAKE_LATENCY, token_delay: float = DEFAULT_FAKE_TOKEN_DELAY):
+        """
+        Deterministic stand-in for the chat model: the same prompt always gets
+        the same reply, after `latency` seconds and `token_delay` per token.
+        """
+        self.latency = latency
+        self.token_delay = token_delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def reply(self, prompt: str) -> str:
+        digest = hashlib.sha256(str(prompt).encode('utf-8')).digest()
+        return " ".join(_FAKE_SENTENCES[byte % len(_FAKE_SENTENCES)] for byte in digest[:3])
+
+    def _count(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def stream(self, prompt: Any, **kwargs) -> Iterator[AIMessageChunk]:
+        self._count()
+        time.sleep(self.latency)
+        for i, word in enumerate(self.reply(prompt).split(" ")):
+            if i:
+                time.sleep(self.token_delay)
+            yield AIMessageChunk(content=word if i == 0 else " " + word)
+
+    async def astream(self, prompt: Any, **kwargs) -> AsyncIterator[AIMessageChunk]:
+        self._count()
+        await asyncio.sleep(self.latency)
+        for i, word in enumerate(self.reply(prompt).split(" ")):
+            if i:
+                await asyncio.sleep(self.token_delay)
+            yield AIMessageChunk(content=word if i == 0 else " " + word)
+
+def create_fake_model() -> FakeChatModel:
+    """Fake model with latency from $BAZI_FAKE_LLM_LATENCY."""
+    return FakeChatModel(float(os.getenv(FAKE_LATENCY_ENV_VAR, DEFAULT_FAKE_LATENCY)))
+
+def use_fake_backend() -> bool:
+    backend = os.getenv(LLM_BACKEND_ENV_VAR, 'gemini')
+    if backend not in ('gemini', 'fake'):
+        raise ValueError(f"Unknown LLM backend: {backend!r}")
+    return backend == 'fake'
+
+class GateBusyError(RuntimeError):
+    """Raised when a request cannot get a slot (queue full or wait timed out)."""
+
+class _Waiter:
+    __slots__ = ('notify', 'granted')
+
+    def __init__(self, notify: Callable[[], None]):
+        self.notify = notify
+        self.granted = False
+
+class ConcurrencyGate:
+    def __init__(self, limit: int = DEFAULT_MAX_CONCURRENCY, max_queue: int = DEFAULT_MAX_QUEUE,
+                 timeout: float = DEFAULT_QUEUE_TIMEOUT):
+        """
+        Cap on requests in flight, shared by threads and event loops alike.
+        Waiters are served first in, first out; a released slot is handed
+        straight to the next waiter.
+        """
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._waiters: Deque[_Waiter] = deque()
+        self._in_flight = 0
+        self._stats = {'admitted': 0, 'queued': 0, 'timeouts': 0, 'rejected': 0, 'peak_in_flight': 0}
+
+    def _try_enter(self, notify: Callable[[], None]) -> Optional[_Waiter]:
+        """Take a slot (returns None) or join the queue (returns the waiter)."""
+        with self._lock:
+            if self._in_flight < self.limit and not self._waiters:
+                self._admit()
+                return None
+            if len(self._waiters) >= self.max_queue:
+                self._stats['rejected'] += 1
+                raise GateBusyError(f"Too many requests waiting ({self.max_queue})")
+            waiter = _Waiter(notify)
+            self._waiters.append(waiter)
+            self._stats['queued'] += 1
+            return waiter
+
+    def _admit(self) -> None:
+        self._in_flight += 1
+        self._stats['admitted'] += 1
+        self._stats['peak_in_flight'] = max(self._stats['peak_in_flight'], self._in_flight)
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Leave the queue after a timeout; False if a slot was granted meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                return False
+            self._waiters.remove(waiter)
+            self._stats['timeouts'] += 1
+            return True
+
+    def release(self) -> None:
+        """Hand the slot to the next waiter, or free it."""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                self._stats['admitted'] += 1
+                try:
+                    waiter.notify()
+                    return
+                except RuntimeError:
+                    continue  # The waiter's event loop has closed
+            self._in_flight -= 1
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """Block until a slot is free; raises GateBusyError on timeout or a full queue."""
+        event = threading.Event()
+        waiter = self._try_enter(event.set)
+        if waiter is None:
+            return
+        if not event.wait(self.timeout if timeout is None else timeout) and self._abandon(waiter):
+            raise GateBusyError("Timed out waiting for a free model slot")
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> None:
+        """Await a slot without blocking the event loop; raises GateBusyError like acquire."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake() -> None:
+            if not future.done():
+                future.set_result(None)
+
+        waiter = self._try_enter(lambda: loop.call_soon_threadsafe(wake))
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            if self._abandon(waiter):
+                raise GateBusyError("Timed out waiting for a free model slot")
+        except asyncio.CancelledError:
+            if not self._abandon(waiter):
+                self.release()
+            raise
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def async_slot(self, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        await self.acquire_async(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Current in-flight and queued counts plus admission, timeout and rejection totals."""
+        with self._lock:
+            return dict(self._stats, in_flight=self._in_flight, waiting=len(self._waiters))
+
+_gate: Optional[ConcurrencyGate] = None
+_gate_lock = threading.Lock()
+
+def get_llm_gate() -> ConcurrencyGate:
+    """Get the process-wide gate (limit from $BAZI_LLM_MAX_CONCURRENCY)."""
+    global _gate
+    with _gate_lock:
+        if _gate is None:
+            _gate = ConcurrencyGate(int(os.getenv(MAX_CONCURRENCY_ENV_VAR, DEFAULT_MAX_CONCURRENCY)))
+        return _gate
+
+async def benchmark_requests(model: Any, gate: ConcurrencyGate, requests: int = 64) -> Dict[str, float]:
+    """
+    Stream distinct prompts through a gate concurrently and measure throughput.
+    Returns:
+        Dictionary with 'requests', 'seconds', 'requests_per_second',
+        'mean_first_token' (seconds) and the gate's 'peak_in_flight'
+    """
+    first_tokens = []
+
+    async def one(i: int) -> None:
+        began = time.perf_counter()
+        async with gate.async_slot():
+            first = True
+            async for _ in model.astream(f"Benchmark question {i}"):
+                if first:
+                    first_tokens.append(time.perf_counter() - began)
+                    first = False
+
+    began = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    seconds = time.perf_counter() - began
+    return {
+        'requests': requests,
+        'seconds': round(seconds, 3),
+        'requests_per_second': round(requests / seconds, 1),
+        'mean_first_token': round(sum(first_tokens) / len(first_tokens), 3),
+        'peak_in_flight': gate.stats()['peak_in_flight'],
+    }
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == 'bench':
+        requests = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+        latency = float(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_FAKE_LATENCY
+        for limit in (1, 8, 32):
+            gate = ConcurrencyGate(limit, max_queue=requests, timeout=3600)
+            print(f"limit {limit}: {asyncio.run(benchmark_requests(FakeChatModel(latency), gate, requests))}")
+    else:
+        print("Usage: python -m src.bazi.llm_backend bench [requests] [latency_seconds]")
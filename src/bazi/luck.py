@@ -0,0 +1,172 @@
+"""
+Luck pillars and annual pillars.
+
+Luck pillars step forward or backward through the sexagenary cycle from the
+month pillar, ten years each, starting at an age set by the distance from
+birth to the adjacent month-opening solar term (three days to a year).
+Annual pillars follow the year cycle. Both are produced by generators and
+materialized into a per-profile cache only as far as a caller asks.
+"""
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.bazi.chart import parse_birth_moment
+from src.bazi.pillar import Pillar
+from src.bazi.sexagenary import get_year_month_at
+from src.bazi.solar_terms import surrounding_jie, to_minutes
+
+GENDERS = ('Male', 'Female')
+
+# Luck pillars per timeline (ten years each)
+LUCK_PILLAR_COUNT = 10
+
+# Days between birth and the adjacent jie that count as one year of start age
+DAYS_PER_LUCK_YEAR = 3
+
+_DAYS_PER_YEAR = 365.2425
+
+def luck_direction(year_index: int, gender: str) -> int:
+    """
+    +1 if luck pillars run forward (Yang year male or Yin year female),
+    otherwise -1.
+    """
+    if gender not in GENDERS:
+        raise ValueError(f"Gender must be one of {GENDERS}, got {gender!r}")
+    yang_year = year_index % 2 == 0
+    return 1 if yang_year == (gender == 'Male') else -1
+
+def luck_start_age(utc_minutes: int, direction: int) -> float:
+    """Age in years at which the first luck pillar starts."""
+    previous, following = surrounding_jie(utc_minutes)
+    term = int(following) if direction > 0 else int(previous)
+    days = abs(term - utc_minutes) / 1440
+    return round(days / DAYS_PER_LUCK_YEAR, 1)
+
+def iter_luck_pillars(month_index: int, direction: int, start_age: float,
+                      birth_year: float, count: int = LUCK_PILLAR_COUNT) -> Iterator[Dict[str, Any]]:
+    """
+    Generate luck pillars in order, each with its position as 'index'.
+    Args:
+        month_index: Sexagenary index of the natal month pillar
+        direction: +1 forward or -1 backward (see luck_direction)
+        start_age: Age at which the first luck pillar starts
+        birth_year: Birth moment as a fractional year, used to date each pillar
+        count: Number of luck pillars to generate
+    """
+    for step in range(1, count + 1):
+        pillar = Pillar((month_index + direction * step) % 60)
+        start = start_age + 10 * (step - 1)
+        yield {
+            'index': step - 1,
+            'pillar': pillar,
+            'start_age': start,
+            'end_age': start + 10,
+            'start_year': int(birth_year + start),
+            'end_year': int(birth_year + start + 10),
+        }
+
+def iter_annual_pillars(start_year: int, birth_year: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Generate annual pillars from a year onwards, without end. Each pillar
+    takes effect at that year's Li Chun (around February 4).
+    """
+    year = start_year
+    while True:
+        entry = {'year': year, 'pillar': Pillar((year - 4) % 60)}
+        if birth_year is not None:
+            entry['age'] = year - birth_year
+        yield entry
+        year += 1
+
+class LuckTimeline:
+    def __init__(self, birth_date: str, birth_time: str, timezone: str, gender: str):
+        """Set up lazy luck and annual pillar generators for one birth."""
+        local, offset = parse_birth_moment(birth_date, birth_time, timezone)
+        utc_minutes = to_minutes(local) - offset
+        year_index, month_index = (int(value) for value in get_year_month_at(utc_minutes))
+
+        self.birth_year = local.year
+        self.direction = luck_direction(year_index, gender)
+        self.start_age = luck_start_age(utc_minutes, self.direction)
+
+        fractional_year = local.year + (local.timetuple().tm_yday - 1) / _DAYS_PER_YEAR
+        self._luck = iter_luck_pillars(month_index, self.direction, self.start_age, fractional_year)
+        self._annual = iter_annual_pillars(self.birth_year, self.birth_year)
+        self._luck_pillars: List[Dict[str, Any]] = []
+        self._annual_pillars: List[Dict[str, Any]] = []
+        # Timelines are shared between sessions; generators are not thread-safe
+        self._lock = threading.Lock()
+
+    def _extend_luck(self, count: int) -> None:
+        with self._lock:
+            while len(self._luck_pillars) < count:
+                entry = next(self._luck, None)
+                if entry is None:
+                    break
+                self._luck_pillars.append(entry)
+
+    def _extend_annual(self, count: int) -> None:
+        with self._lock:
+            while len(self._annual_pillars) < count:
+                self._annual_pillars.append(next(self._annual))
+
+    def luck_pillars(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Luck pillars start..stop (all of them if stop is None)."""
+        self._extend_luck(LUCK_PILLAR_COUNT if stop is None else stop)
+        return self._luck_pillars[start:stop]
+
+    def luck_pillar_for_year(self, year: int) -> Optional[Dict[str, Any]]:
+        """The luck pillar in force during a year (None before the first one starts)."""
+        for position in range(LUCK_PILLAR_COUNT):
+            self._extend_luck(position + 1)
+            if position >= len(self._luck_pillars):
+                return None
+            entry = self._luck_pillars[position]
+            if entry['start_year'] > year:
+                return None
+            if year < entry['end_year']:
+                return entry
+        return None
+
+    def annual_pillars(self, start_year: int, count: int = 10) -> List[Dict[str, Any]]:
+        """Annual pillars for count years from start_year (no earlier than the birth year)."""
+        first = max(start_year - self.birth_year, 0)
+        self._extend_annual(first + count)
+        return self._annual_pillars[first:first + count]
+
+    def page(self, page: int, page_size: int = 1) -> List[Dict[str, Any]]:
+        """One page of luck pillars, each with its annual pillars attached."""
+        entries = self.luck_pillars(page * page_size, (page + 1) * page_size)
+        return [
+            dict(entry, annual=self.annual_pillars(entry['start_year'], entry['end_year'] - entry['start_year']))
+            for entry in entries
+        ]
+
+    @property
+    def page_count(self) -> int:
+        return LUCK_PILLAR_COUNT
+
+@lru_cache(maxsize=256)
+def get_luck_timeline(birth_date: str, birth_time: str, timezone: str, gender: str) -> LuckTimeline:
+    """Get the cached timeline for a birth, creating it on first use."""
+    return LuckTimeline(birth_date, birth_time, timezone, gender)
+
+def timeline_for_profile(profile: Dict[str, Any]) -> Optional[LuckTimeline]:
+    """Cached timeline for a saved profile, or None if it has no gender."""
+    if profile.get('gender') not in GENDERS:
+        return None
+    return get_luck_timeline(profile['birth_date'], profile['birth_time'],
+                             profile['timezone'], profile['gender'])
+
+def format_luck_summary(timeline: LuckTimeline, year: int) -> str:
+    """Render the current luck pillar and the next few annual pillars for prompts."""
+    current = timeline.luck_pillar_for_year(year)
+    lines = [f"Luck pillars run {'forward' if timeline.direction > 0 else 'backward'}, "
+             f"starting at age {timeline.start_age}"]
+    if current is not None:
+        lines.append(f"Current Luck Pillar: {current['pillar'].chinese} ({current['pillar'].english}), "
+                     f"{current['start_year']}-{current['end_year']}")
+    lines.append("Annual Pillars: " + ", ".join(
+        f"{entry['year']} {entry['pillar'].chinese}" for entry in timeline.annual_pillars(year, 5)))
+    return "\n".join(lines)
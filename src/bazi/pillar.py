@@ -0,0 +1,152 @@
+"""
+Compact, interned Stem, Branch and Pillar value types.
+
+Each of the 10 stems, 12 branches and 60 pillars exists exactly once, so
+pillars can be compared by identity and passed around without re-parsing
+strings such as "Yin Metal Ox".
+"""
+from functools import lru_cache
+from typing import Tuple, Union
+
+from src.bazi.elements import (
+    BRANCH_ANIMALS, BRANCH_ELEMENTS, BRANCHES, ELEMENTS, STEM_ELEMENTS, STEMS, stem_polarity
+)
+from src.bazi.sexagenary import PILLAR_CHINESE, PILLAR_ENGLISH, pillar_index
+
+class _Interned:
+    """Base for immutable value types with one instance per code."""
+    __slots__ = ('code',)
+    _instances: Tuple['_Interned', ...] = ()
+
+    def __new__(cls, code: int):
+        if not 0 <= code < len(cls._instances):
+            raise ValueError(f"{cls.__name__} code must be in 0..{len(cls._instances) - 1}, got {code!r}")
+        return cls._instances[code]
+
+    @classmethod
+    def _create(cls, code: int) -> '_Interned':
+        instance = object.__new__(cls)
+        object.__setattr__(instance, 'code', code)
+        return instance
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return type(self), (self.code,)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self})"
+
+class Stem(_Interned):
+    __slots__ = ()
+
+    @property
+    def name(self) -> str:
+        return STEMS[self.code]
+
+    @property
+    def element(self) -> str:
+        return ELEMENTS[STEM_ELEMENTS[self.code]]
+
+    @property
+    def element_code(self) -> int:
+        return STEM_ELEMENTS[self.code]
+
+    @property
+    def polarity(self) -> str:
+        return stem_polarity(self.code)
+
+    @property
+    def english(self) -> str:
+        """English form, e.g. 'Yin Metal'."""
+        return f"{self.polarity} {self.element}"
+
+    def __str__(self) -> str:
+        return self.name
+
+class Branch(_Interned):
+    __slots__ = ()
+
+    @property
+    def name(self) -> str:
+        return BRANCHES[self.code]
+
+    @property
+    def animal(self) -> str:
+        return BRANCH_ANIMALS[self.code]
+
+    @property
+    def element(self) -> str:
+        return ELEMENTS[BRANCH_ELEMENTS[self.code]]
+
+    @property
+    def element_code(self) -> int:
+        return BRANCH_ELEMENTS[self.code]
+
+    def __str__(self) -> str:
+        return self.name
+
+class Pillar(_Interned):
+    """A stem-branch pair, identified by its sexagenary index (0 = Jia Zi)."""
+    __slots__ = ()
+
+    @classmethod
+    def from_parts(cls, stem: Union[Stem, int], branch: Union[Branch, int]) -> 'Pillar':
+        """Get the pillar for a stem and branch of matching polarity."""
+        stem_code = stem.code if isinstance(stem, Stem) else stem
+        branch_code = branch.code if isinstance(branch, Branch) else branch
+        if stem_code % 2 != branch_code % 2:
+            raise ValueError(f"{STEMS[stem_code]} and {BRANCHES[branch_code]} do not form a pillar")
+        return cls(pillar_index(stem_code, branch_code))
+
+    @property
+    def index(self) -> int:
+        return self.code
+
+    @property
+    def stem(self) -> Stem:
+        return Stem(self.code % 10)
+
+    @property
+    def branch(self) -> Branch:
+        return Branch(self.code % 12)
+
+    @property
+    def chinese(self) -> str:
+        """Pinyin form, e.g. 'Xin Chou'."""
+        return PILLAR_CHINESE[self.code]
+
+    @property
+    def english(self) -> str:
+        """English form, e.g. 'Yin Metal Ox'."""
+        return PILLAR_ENGLISH[self.code]
+
+    @property
+    def element(self) -> str:
+        """Element of the pillar's stem."""
+        return self.stem.element
+
+    def __str__(self) -> str:
+        return self.chinese
+
+Stem._instances = tuple(Stem._create(code) for code in range(10))
+Branch._instances = tuple(Branch._create(code) for code in range(12))
+Pillar._instances = tuple(Pillar._create(code) for code in range(60))
+
+_PILLARS_BY_NAME = {
+    name.lower(): pillar
+    for pillar in Pillar._instances
+    for name in (pillar.chinese, pillar.english)
+}
+
+@lru_cache(maxsize=256)
+def parse_pillar(text: str) -> Pillar:
+    """
+    Parse a pillar from its pinyin ("Xin Chou") or English ("Yin Metal Ox")
+    form, ignoring case and extra whitespace.
+    """
+    pillar = _PILLARS_BY_NAME.get(" ".join(text.split()).lower())
+    if pillar is None:
+        raise ValueError(f"Unrecognised pillar: {text!r}")
+    return pillar
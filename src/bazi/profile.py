@@ -2,56 +2,41 @@
 BAZI profile management module.
 """
 from pathlib import Path
-import json
 from typing import Dict, List, Optional
 import random
 
+from src.bazi.profile_store import ProfileRepository, open_profile_store
+from src.bazi.reference_profiles import get_reference_index
+
 class BaziProfileManager:
-    def __init__(self, profiles_dir: str = 'profiles'):
+    def __init__(self, profiles_dir: str = 'profiles', backend: Optional[str] = None):
         self.profiles_dir = Path(profiles_dir)
         self.profiles_dir.mkdir(exist_ok=True)
+        self.store: ProfileRepository = open_profile_store(self.profiles_dir, backend)
         
     def save_profile(self, user_data: Dict) -> str:
         """
-        Save user profile to a JSON file.
-        Returns: Filename of saved profile
+        Save user profile to the profile store.
+        Returns: Id of saved profile
         """
-        # Create a filename from user's name
-        safe_name = "".join(c for c in user_data["name"] if c.isalnum())
-        filename = self.profiles_dir / f"{safe_name}.json"
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(user_data, f, indent=4)
-            
-        return str(filename)
+        return self.store.save(user_data)
     
-    def load_profile(self, filename: str) -> Optional[Dict]:
-        """Load a specific user profile."""
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading profile {filename}: {str(e)}")
-            return None
+    def load_profile(self, profile_id: str) -> Optional[Dict]:
+        """Load a specific user profile by id (a JSON filename is accepted too)."""
+        return self.store.get(Path(profile_id).stem)
     
     def load_all_profiles(self) -> List[Dict]:
         """Load all user profiles."""
-        profiles = []
-        for profile_file in self.profiles_dir.glob('*.json'):
-            if profile := self.load_profile(str(profile_file)):
-                profiles.append(profile)
-        return profiles
+        return list(self.store.iter_profiles())
+    
+    def list_profiles(self, search: str = '', offset: int = 0, limit: Optional[int] = 50) -> List[Dict[str, str]]:
+        """List profile ids and names without loading profile bodies."""
+        return self.store.list(search, offset, limit)
     
     def get_random_profile(self) -> Optional[Dict]:
-        """Get a random profile from the profiles directory."""
-        profile_files = list(self.profiles_dir.glob('baziprofiledata*.md'))
-        if not profile_files:
-            return None
-        
-        selected_file = random.choice(profile_files)
-        try:
-            with open(selected_file, 'r', encoding='utf-8') as f:
-                return {"content": f.read(), "filename": str(selected_file)}
-        except Exception as e:
-            print(f"Error loading random profile: {str(e)}")
+        """Get a random reference profile from the in-memory reference index."""
+        index = get_reference_index(self.profiles_dir)
+        if not index.profiles:
             return None
+        selected = random.choice(index.profiles)
+        return {"content": selected.content, "filename": str(self.profiles_dir / selected.filename)}
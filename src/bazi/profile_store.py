@@ -0,0 +1,550 @@
+"""
+Profile repositories.
+
+Profiles are stored behind a small repository interface with two backends:
+the original one-JSON-file-per-profile layout, indexed by a manifest of
+names, paths and mtimes, and a SQLite database with a name index. Either way
+the sidebar can list, search and page through id/name pairs without loading
+any profile bodies.
+
+Import existing JSON profiles into SQLite, or measure concurrent save
+throughput of both backends, with::
+
+    python -m src.bazi.profile_store migrate user_profiles [user_profiles/profiles.sqlite3]
+    python -m src.bazi.profile_store bench [threads] [saves_per_thread]
+"""
+import copy
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+PathLike = Union[str, Path]
+
+DEFAULT_DB_NAME = 'profiles.sqlite3'
+
+# Name/path/mtime index kept beside JSON profiles (not itself a *.json profile)
+MANIFEST_NAME = 'profiles.manifest'
+
+# Append-only log of manifest changes, folded into the manifest on compaction
+JOURNAL_NAME = 'profiles.journal'
+
+# Journal records after which the JSON backend compacts into a new snapshot
+COMPACT_AFTER = 500
+
+# Recently opened profiles kept in memory by the JSON backend
+PROFILE_CACHE_SIZE = 64
+
+# Backend used by open_profile_store when none is given
+BACKEND_ENV_VAR = 'BAZI_PROFILE_BACKEND'
+
+def profile_id(name: str) -> str:
+    """Base id for a profile name (the same stem the JSON layout uses)."""
+    return "".join(c for c in name if c.isalnum()) or 'profile'
+
+def check_profile_id(id: str) -> str:
+    """Return id unchanged, or raise ValueError if it could escape the profiles directory."""
+    if not id or '..' in id or any(separator in id for separator in ('/', '\\')):
+        raise ValueError(f"Invalid profile id: {id!r}")
+    return id
+
+def split_profile_id(id: str) -> Tuple[str, int]:
+    """Base id and numbered suffix of an id: 'Alex-3' gives ('Alex', 3), 'Alex' gives ('Alex', 1)."""
+    base, dash, suffix = id.rpartition('-')
+    if dash and suffix.isdigit():
+        return base, int(suffix)
+    return id, 1
+
+class ProfileIdAllocator:
+    def __init__(self, last_suffix: Callable[[str], int]):
+        """
+        Unused ids for one batch of saves. last_suffix(base) returns the
+        highest suffix stored under a base id (1 for the bare base, 0 if
+        none); it is called at most once per base and later ids for that
+        base are counted up in memory.
+        """
+        self._last_suffix = last_suffix
+        self._last: Dict[str, int] = {}
+        # Suffixes claimed by held ids before their base was looked up
+        self._claimed: Dict[str, int] = {}
+
+    def claim(self, id: str) -> None:
+        """Record an id saved in this batch so new ids skip past it."""
+        base, suffix = split_profile_id(id)
+        if base in self._last:
+            self._last[base] = max(self._last[base], suffix)
+        else:
+            self._claimed[base] = max(self._claimed.get(base, 0), suffix)
+
+    def new_id(self, base: str) -> str:
+        """base if unused, else base-N with N one past the highest suffix taken."""
+        if base not in self._last:
+            self._last[base] = max(self._last_suffix(base), self._claimed.pop(base, 0))
+        self._last[base] += 1
+        suffix = self._last[base]
+        return base if suffix == 1 else f"{base}-{suffix}"
+
+def last_suffixes(ids: Iterable[str]) -> Dict[str, int]:
+    """Highest suffix per base id over a collection of ids (see split_profile_id)."""
+    last: Dict[str, int] = {}
+    for id in ids:
+        base, suffix = split_profile_id(id)
+        last[base] = max(last.get(base, 0), suffix)
+    return last
+
+def assign_profile_id(profile: Dict[str, Any], ids: ProfileIdAllocator, fresh: bool = False) -> str:
+    """
+    Id for saving a profile. A profile that already has an id keeps it, so
+    only a caller holding that id replaces the record; a profile without one
+    always gets an unused id, with a numbered suffix if its base id is taken.
+    Args:
+        ids: Allocator for the batch the profile is saved in
+        fresh: Ignore any existing id and always pick an unused one
+    """
+    if profile.get('id') and not fresh:
+        id = check_profile_id(str(profile['id']))
+        ids.claim(id)
+        return id
+    return ids.new_id(profile_id(profile['name']))
+
+class ProfileRepository:
+    """Interface shared by the profile backends."""
+
+    def save(self, profile: Dict[str, Any]) -> str:
+        """Insert or replace a profile; returns its id."""
+        raise NotImplementedError
+
+    def get(self, id: str) -> Optional[Dict[str, Any]]:
+        """Load one profile, or None if it does not exist."""
+        raise NotImplementedError
+
+    def save_many(self, profiles: List[Dict[str, Any]], fresh: bool = False) -> int:
+        """
+        Save many profiles as one batch; returns the number saved. With fresh,
+        every profile gets a new unused id (see assign_profile_id), so none
+        overwrites another.
+        """
+        for profile in profiles:
+            if fresh:
+                profile.pop('id', None)
+            self.save(profile)
+        return len(profiles)
+
+    def delete(self, id: str) -> bool:
+        """Delete a profile; returns whether it existed."""
+        raise NotImplementedError
+
+    def list(self, search: str = '', offset: int = 0, limit: Optional[int] = 50) -> List[Dict[str, str]]:
+        """List {'id', 'name'} entries ordered by name, optionally filtered by a name substring."""
+        raise NotImplementedError
+
+    def count(self, search: str = '') -> int:
+        """Number of profiles matching a name substring."""
+        raise NotImplementedError
+
+    def iter_profiles(self) -> Iterator[Dict[str, Any]]:
+        """Yield every full profile."""
+        for entry in self.list(limit=None):
+            profile = self.get(entry['id'])
+            if profile is not None:
+                yield profile
+
+class JsonProfileRepository(ProfileRepository):
+    def __init__(self, profiles_dir: PathLike, cache_size: int = PROFILE_CACHE_SIZE,
+                 compact_after: int = COMPACT_AFTER):
+        """
+        One JSON file per profile, named after the profile id.
+
+        Names, paths and mtimes are indexed by a manifest snapshot plus an
+        append-only journal of changes, so listings never open a profile
+        file and a save appends one line instead of rewriting the index.
+        The journal is folded into a new snapshot every compact_after
+        records. Recently opened profiles are held in an LRU keyed by id and
+        validated against the file's mtime.
+        """
+        self.profiles_dir = Path(profiles_dir)
+        self.profiles_dir.mkdir(exist_ok=True)
+        self.manifest_path = self.profiles_dir / MANIFEST_NAME
+        self.journal_path = self.profiles_dir / JOURNAL_NAME
+        self.cache_size = cache_size
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        self._manifest: Optional[Dict[str, Dict[str, Any]]] = None
+        self._manifest_mtime = None
+        self._journal_offset = 0
+        self._journal_records = 0
+        self._cache: 'OrderedDict[str, Tuple[int, Dict[str, Any]]]' = OrderedDict()
+
+    def _path(self, id: str) -> Path:
+        return self.profiles_dir / f"{check_profile_id(id)}.json"
+
+    def _write_atomic(self, path: Path, text: str) -> None:
+        """Write a file through a uniquely named temporary file and a rename."""
+        fd, tmp_name = tempfile.mkstemp(dir=self.profiles_dir, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    def compact(self) -> None:
+        """
+        Fold the journal into a new manifest snapshot and empty the journal.
+        Compaction assumes a single writing process per directory.
+        """
+        with self._lock:
+            self._entries_by_id()
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        with self._lock:
+            self._write_atomic(self.manifest_path, json.dumps(self._manifest))
+            open(self.journal_path, 'w').close()
+            self._manifest_mtime = self.manifest_path.stat().st_mtime_ns
+            self._journal_offset = 0
+            self._journal_records = 0
+
+    def rebuild_manifest(self) -> int:
+        """Rebuild the manifest by reading every profile file; returns the entry count."""
+        with self._lock:
+            manifest = {}
+            for path in self.profiles_dir.glob('*.json'):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        name = json.load(f).get('name')
+                except (OSError, ValueError):
+                    continue
+                if name:
+                    manifest[path.stem] = {'name': name, 'path': path.name, 'mtime_ns': path.stat().st_mtime_ns}
+            self._manifest = manifest
+            self._write_snapshot()
+            return len(manifest)
+
+    @staticmethod
+    def _apply(manifest: Dict[str, Dict[str, Any]], record: Dict[str, Any]) -> None:
+        if record['op'] == 'put':
+            manifest[record['id']] = {key: record[key] for key in ('name', 'path', 'mtime_ns')}
+        elif record['op'] == 'delete':
+            manifest.pop(record['id'], None)
+
+    def _replay_journal(self) -> None:
+        """Apply journal records appended since the last read (by any process)."""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                f.seek(self._journal_offset)
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break   # a record still being written; read it next time
+                    self._apply(self._manifest, record)
+                    self._journal_offset += len(line)
+                    self._journal_records += 1
+        except FileNotFoundError:
+            pass
+
+    def _entries_by_id(self) -> Dict[str, Dict[str, Any]]:
+        """The manifest snapshot plus the journal, re-read only as far as it changed."""
+        with self._lock:
+            try:
+                mtime = self.manifest_path.stat().st_mtime_ns
+            except FileNotFoundError:
+                self.rebuild_manifest()
+                return self._manifest
+            try:
+                journal_size = self.journal_path.stat().st_size
+            except FileNotFoundError:
+                journal_size = 0
+
+            if self._manifest is None or mtime != self._manifest_mtime or journal_size < self._journal_offset:
+                # First use, or another process compacted: start from the snapshot
+                try:
+                    with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                        self._manifest = json.load(f)
+                except (OSError, ValueError):
+                    self.rebuild_manifest()
+                    return self._manifest
+                self._manifest_mtime = mtime
+                self._journal_offset = 0
+                self._journal_records = 0
+            if journal_size > self._journal_offset:
+                self._replay_journal()
+            return self._manifest
+
+    def _append(self, *records: Dict[str, Any]) -> None:
+        """Journal manifest changes in one write and compact when the journal is long."""
+        with self._lock:
+            manifest = self._entries_by_id()
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(record) + '\n' for record in records))
+            for record in records:
+                self._apply(manifest, record)
+            self._replay_journal()
+            if self._journal_records >= self.compact_after:
+                self.compact()
+
+    def save(self, profile: Dict[str, Any]) -> str:
+        self.save_many([profile])
+        return profile['id']
+
+    def save_many(self, profiles: List[Dict[str, Any]], fresh: bool = False) -> int:
+        """Write many profile files, then journal all their index entries at once."""
+        with self._lock:
+            manifest = self._entries_by_id()
+            records = []
+            suffixes: Optional[Dict[str, int]] = None
+
+            def last_suffix(base: str) -> int:
+                # One pass over the manifest, only for batches that need new ids
+                nonlocal suffixes
+                if suffixes is None:
+                    suffixes = last_suffixes(manifest)
+                return suffixes.get(base, 0)
+
+            ids = ProfileIdAllocator(last_suffix)
+            for profile in profiles:
+                id = assign_profile_id(profile, ids, fresh)
+                profile['id'] = id
+                path = self._path(id)
+                self._write_atomic(path, json.dumps(profile, indent=4))
+                mtime = path.stat().st_mtime_ns
+                records.append({'op': 'put', 'id': id, 'name': profile['name'], 'path': path.name, 'mtime_ns': mtime})
+                self._remember(id, mtime, profile)
+            if records:
+                self._append(*records)
+        return len(profiles)
+
+    def _remember(self, id: str, mtime: int, profile: Dict[str, Any]) -> None:
+        # Cache a private copy; callers get copies too, so in-place edits by
+        # one session never reach another without a save
+        self._cache[id] = (mtime, copy.deepcopy(profile))
+        self._cache.move_to_end(id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get(self, id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(id)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            cached = self._cache.get(id)
+            if cached is not None and cached[0] == mtime:
+                self._cache.move_to_end(id)
+                return copy.deepcopy(cached[1])
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            return None
+        profile.setdefault('id', id)
+        with self._lock:
+            self._remember(id, mtime, profile)
+        return profile
+
+    def delete(self, id: str) -> bool:
+        with self._lock:
+            self._cache.pop(id, None)
+            if id in self._entries_by_id():
+                self._append({'op': 'delete', 'id': id})
+            try:
+                self._path(id).unlink()
+                return True
+            except FileNotFoundError:
+                return False
+
+    def _entries(self) -> List[Dict[str, str]]:
+        entries = [{'id': id, 'name': entry['name']} for id, entry in self._entries_by_id().items()]
+        return sorted(entries, key=lambda entry: entry['name'].lower())
+
+    def list(self, search: str = '', offset: int = 0, limit: Optional[int] = 50) -> List[Dict[str, str]]:
+        entries = [entry for entry in self._entries() if search.lower() in entry['name'].lower()]
+        return entries[offset:None if limit is None else offset + limit]
+
+    def count(self, search: str = '') -> int:
+        return len(self.list(search, limit=None))
+
+class SqliteProfileRepository(ProfileRepository):
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS profiles (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_profiles_name ON profiles (name COLLATE NOCASE);
+    """
+
+    def __init__(self, db_path: PathLike):
+        """Profiles in a SQLite database; one connection shared behind a lock."""
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+
+    def save(self, profile: Dict[str, Any]) -> str:
+        self.save_many([profile])
+        return profile['id']
+
+    def _last_suffix(self, base: str) -> int:
+        """Highest suffix stored under a base id, from one range scan of the primary key."""
+        row = self._conn.execute(
+            "SELECT MAX(CASE WHEN id = :base THEN 1 ELSE CAST(substr(id, :start) AS INTEGER) END) FROM profiles "
+            "WHERE id = :base OR (id >= :low AND id < :high "
+            "AND substr(id, :start) GLOB '[0-9]*' AND substr(id, :start) NOT GLOB '*[^0-9]*')",
+            {'base': base, 'start': len(base) + 2, 'low': base + '-', 'high': base + '.'},
+        ).fetchone()
+        return row[0] or 0
+
+    def save_many(self, profiles: List[Dict[str, Any]], fresh: bool = False) -> int:
+        """Insert or replace many profiles in one transaction, assigning ids as they go."""
+        now = time.time()
+        with self._lock, self._conn:
+            ids = ProfileIdAllocator(self._last_suffix)
+            for profile in profiles:
+                profile['id'] = assign_profile_id(profile, ids, fresh)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO profiles (id, name, data, updated_at) VALUES (?, ?, ?, ?)",
+                    (profile['id'], profile['name'], json.dumps(profile), now),
+                )
+        return len(profiles)
+
+    def get(self, id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM profiles WHERE id = ?", (id,)).fetchone()
+        if row is None:
+            return None
+        profile = json.loads(row[0])
+        profile.setdefault('id', id)
+        return profile
+
+    def delete(self, id: str) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM profiles WHERE id = ?", (id,)).rowcount > 0
+
+    @staticmethod
+    def _like(search: str) -> str:
+        escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f"%{escaped}%"
+
+    def list(self, search: str = '', offset: int = 0, limit: Optional[int] = 50) -> List[Dict[str, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name FROM profiles WHERE name LIKE ? ESCAPE '\\' "
+                "ORDER BY name COLLATE NOCASE LIMIT ? OFFSET ?",
+                (self._like(search), -1 if limit is None else limit, offset),
+            ).fetchall()
+        return [{'id': id, 'name': name} for id, name in rows]
+
+    def count(self, search: str = '') -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM profiles WHERE name LIKE ? ESCAPE '\\'", (self._like(search),)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+def migrate_json_profiles(profiles_dir: PathLike, db_path: Optional[PathLike] = None) -> int:
+    """
+    Import every JSON profile in a directory into the SQLite store.
+    Returns:
+        Number of profiles imported (existing rows with the same id are replaced)
+    """
+    profiles_dir = Path(profiles_dir)
+    source = JsonProfileRepository(profiles_dir)
+    target = SqliteProfileRepository(db_path or profiles_dir / DEFAULT_DB_NAME)
+    try:
+        return target.save_many(list(source.iter_profiles()))
+    finally:
+        target.close()
+
+def benchmark_saves(store: ProfileRepository, threads: int = 8, saves_per_thread: int = 250) -> Dict[str, float]:
+    """
+    Save distinct profiles from many threads at once and measure throughput.
+    Returns:
+        Dictionary with 'saves', 'seconds', 'saves_per_second' and 'missing'
+        (profiles that could not be read back, which should be 0)
+    """
+    analysis = 'x' * 4096
+    start = threading.Barrier(threads + 1)
+    ids: List[str] = []
+
+    def worker(thread: int) -> None:
+        start.wait()
+        for i in range(saves_per_thread):
+            ids.append(store.save({'name': f"Bench {thread}-{i}", 'bazi_analysis': analysis}))
+
+    workers = [threading.Thread(target=worker, args=(thread,)) for thread in range(threads)]
+    for thread in workers:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    seconds = time.perf_counter() - began
+
+    saves = threads * saves_per_thread
+    return {
+        'saves': saves,
+        'seconds': round(seconds, 3),
+        'saves_per_second': round(saves / seconds, 1),
+        'missing': sum(1 for id in ids if store.get(id) is None) + saves - len(set(ids)),
+    }
+
+_stores: Dict[tuple, ProfileRepository] = {}
+_stores_lock = threading.Lock()
+
+def open_profile_store(profiles_dir: PathLike, backend: Optional[str] = None) -> ProfileRepository:
+    """
+    Get the process-wide profile repository for a directory.
+    Args:
+        profiles_dir: Directory holding JSON profiles and/or the SQLite database
+        backend: 'sqlite' or 'json' (defaults to $BAZI_PROFILE_BACKEND, then 'sqlite')
+    A new SQLite database is seeded from any JSON profiles already in the directory.
+    """
+    backend = backend or os.getenv(BACKEND_ENV_VAR, 'sqlite')
+    key = (Path(profiles_dir).resolve(), backend)
+    with _stores_lock:
+        if key in _stores:
+            return _stores[key]
+        if backend == 'json':
+            store = JsonProfileRepository(profiles_dir)
+        elif backend == 'sqlite':
+            db_path = Path(profiles_dir) / DEFAULT_DB_NAME
+            is_new = not db_path.exists()
+            store = SqliteProfileRepository(db_path)
+            if is_new:
+                store.save_many(list(JsonProfileRepository(profiles_dir).iter_profiles()))
+        else:
+            raise ValueError(f"Unknown profile backend: {backend!r}")
+        _stores[key] = store
+        return store
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 3 and sys.argv[1] == 'migrate':
+        count = migrate_json_profiles(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+        print(f"Imported {count} profiles")
+    elif len(sys.argv) >= 2 and sys.argv[1] == 'bench':
+        threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+        saves = int(sys.argv[3]) if len(sys.argv) > 3 else 250
+        for backend in ('json', 'sqlite'):
+            with tempfile.TemporaryDirectory() as tmp:
+                store = (JsonProfileRepository(tmp) if backend == 'json'
+                         else SqliteProfileRepository(Path(tmp) / DEFAULT_DB_NAME))
+                print(f"{backend}: {benchmark_saves(store, threads, saves)}")
+    else:
+        print("Usage: python -m src.bazi.profile_store migrate <profiles_dir> [database]\n"
+              "       python -m src.bazi.profile_store bench [threads] [saves_per_thread]")
@@ -0,0 +1,242 @@
+"""
+Structured index over the reference profile documents.
+
+The profiles/baziprofiledata*.md files are parsed once into typed sections
+(birth info, pillars, Day Master, Core Nature, Natural Gifts, ...) and
+indexed by Day Master and by pillar. The parsed index is persisted next to
+the documents and rebuilt only when a document's mtime changes, so lookups
+by chart attributes never touch the documents themselves. The documents'
+mtimes are rechecked at most every RELOAD_CHECK_INTERVAL seconds, or on an
+explicit reload_reference_index().
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from src.bazi.chart import PILLARS
+from src.bazi.pillar import Pillar
+
+PathLike = Union[str, Path]
+
+PROFILE_GLOB = 'baziprofiledata*.md'
+
+INDEX_CACHE_NAME = '.reference_index.json'
+
+# Bump when the parser changes so stale caches are rebuilt
+PARSER_VERSION = 1
+
+# Top-level headings, in document order; a heading line may carry a value
+# after a colon (e.g. "Core Nature: Domain Commander")
+SECTION_TITLES = (
+    'Your Birth Info', 'Your Bazi', 'Notable Features', 'Core Nature', 'Natural Gifts',
+    'Growth Opportunities', 'Working With Your Energy', 'Optimal Timing',
+    'Environmental Recommendations', 'Application Strategies',
+)
+
+# Trailing paragraph after the last list
+SUMMARY = 'Summary'
+
+# Question keywords that call for each section in a chat prompt
+SECTION_KEYWORDS = {
+    'Core Nature': ('personality', 'nature', 'who am i', 'character', 'day master'),
+    'Notable Features': ('feature', 'special', 'unique', 'notable'),
+    'Natural Gifts': ('strength', 'gift', 'talent', 'good at', 'career', 'skill'),
+    'Growth Opportunities': ('weakness', 'improve', 'grow', 'challenge', 'work on'),
+    'Optimal Timing': ('when', 'time', 'timing', 'hour', 'schedule'),
+    'Environmental Recommendations': ('home', 'office', 'environment', 'space', 'colour', 'color'),
+    'Application Strategies': ('how can', 'strategy', 'advice', 'apply', 'should i'),
+}
+
+DEFAULT_SECTIONS = ('Core Nature',)
+
+@dataclass
+class ProfileSection:
+    title: str
+    value: str = ''
+    paragraphs: List[str] = field(default_factory=list)
+    items: List[str] = field(default_factory=list)
+
+    def to_markdown(self) -> str:
+        heading = f"### {self.title}: {self.value}" if self.value else f"### {self.title}"
+        body = self.paragraphs[:1] + [f"- {item}" for item in self.items] + self.paragraphs[1:]
+        return "\n".join([heading, *body])
+
+@dataclass
+class ReferenceProfile:
+    filename: str
+    birth_info: str
+    pillars: Dict[str, str]
+    day_master: str
+    core_nature: str
+    sections: Dict[str, ProfileSection]
+    content: str
+
+    def render(self, titles: Iterable[str]) -> str:
+        """Markdown for the given sections, in document order, skipping missing ones."""
+        wanted = set(titles)
+        return "\n\n".join(section.to_markdown() for title, section in self.sections.items() if title in wanted)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ReferenceProfile':
+        data = dict(data)
+        data['sections'] = {title: ProfileSection(**section) for title, section in data['sections'].items()}
+        return cls(**data)
+
+_HEADING = re.compile(r'^(%s)(?:\s*:\s*(.*))?$' % '|'.join(re.escape(title) for title in SECTION_TITLES))
+_PILLAR_LINE = re.compile(r'^(Year|Month|Day|Hour) Pillar:\s*(.+)$')
+_DAY_MASTER_LINE = re.compile(r'^Day Master:\s*((?:Yang|Yin) \w+)')
+
+def parse_profile(text: str, filename: str) -> ReferenceProfile:
+    """Split a reference profile document into typed sections."""
+    sections: Dict[str, ProfileSection] = {}
+    current: Optional[ProfileSection] = None
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        indented = raw[:1].isspace()
+        match = None if indented else _HEADING.match(line)
+        if match:
+            current = sections.setdefault(match.group(1), ProfileSection(match.group(1), match.group(2) or ''))
+        elif current is None:
+            continue
+        elif indented:
+            current.items.append(line)
+        elif current.title == 'Application Strategies' and current.items:
+            # The closing paragraph follows the last list
+            current = sections.setdefault(SUMMARY, ProfileSection(SUMMARY))
+            current.paragraphs.append(line)
+        else:
+            current.paragraphs.append(line)
+
+    pillars = {}
+    for item in sections.get('Your Bazi', ProfileSection('Your Bazi')).items:
+        pillar_match = _PILLAR_LINE.match(item)
+        if pillar_match:
+            pillars[pillar_match.group(1).lower()] = pillar_match.group(2).strip()
+    day_master = ''
+    for item in sections.get('Notable Features', ProfileSection('Notable Features')).items:
+        day_master_match = _DAY_MASTER_LINE.match(item)
+        if day_master_match:
+            day_master = day_master_match.group(1)
+
+    birth = sections.get('Your Birth Info')
+    return ReferenceProfile(
+        filename=filename,
+        birth_info=birth.paragraphs[0] if birth and birth.paragraphs else '',
+        pillars=pillars,
+        day_master=day_master,
+        core_nature=sections['Core Nature'].value if 'Core Nature' in sections else '',
+        sections=sections,
+        content=text,
+    )
+
+def select_sections(question: str) -> Tuple[str, ...]:
+    """Sections whose keywords appear in a question (DEFAULT_SECTIONS if none do)."""
+    question = question.lower()
+    chosen = tuple(title for title, words in SECTION_KEYWORDS.items() if any(word in question for word in words))
+    return chosen or DEFAULT_SECTIONS
+
+class ReferenceIndex:
+    def __init__(self, profiles: Sequence[ReferenceProfile]):
+        """In-memory lookup of reference profiles by file, Day Master and pillar."""
+        self.profiles = list(profiles)
+        self.by_filename = {profile.filename: profile for profile in self.profiles}
+        self.by_day_master: Dict[str, List[ReferenceProfile]] = {}
+        # Keyed by pillar text: the hand-written documents include stem and
+        # branch pairs outside the sexagenary cycle (e.g. 'Yang Metal Rooster')
+        self.by_pillar: Dict[Tuple[str, str], List[ReferenceProfile]] = {}
+        for profile in self.profiles:
+            self.by_day_master.setdefault(profile.day_master, []).append(profile)
+            for name, pillar in profile.pillars.items():
+                self.by_pillar.setdefault((name, pillar.lower()), []).append(profile)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def get(self, filename: str) -> Optional[ReferenceProfile]:
+        return self.by_filename.get(Path(filename).name)
+
+    def find(self, day_master: Optional[str] = None,
+             pillar_indices: Optional[Sequence[int]] = None) -> Optional[ReferenceProfile]:
+        """
+        Best reference profile for chart attributes: the one sharing the most
+        pillars, preferring a matching Day Master. None if nothing matches.
+        """
+        scores: Dict[str, int] = {}
+        for profile in self.by_day_master.get(day_master, []) if day_master else []:
+            scores[profile.filename] = scores.get(profile.filename, 0) + 10
+        for name, index in zip(PILLARS, pillar_indices or ()):
+            for profile in self.by_pillar.get((name, Pillar(int(index)).english.lower()), []):
+                scores[profile.filename] = scores.get(profile.filename, 0) + 1
+        if not scores:
+            return None
+        return self.by_filename[max(sorted(scores), key=scores.get)]
+
+def _source_mtimes(profiles_dir: Path) -> Dict[str, int]:
+    return {path.name: path.stat().st_mtime_ns for path in sorted(profiles_dir.glob(PROFILE_GLOB))}
+
+def build_index(profiles_dir: PathLike) -> ReferenceIndex:
+    """
+    Load the index for a directory from its cache file, reparsing the
+    documents and rewriting the cache only if any document changed.
+    """
+    profiles_dir = Path(profiles_dir)
+    mtimes = _source_mtimes(profiles_dir)
+    cache_path = profiles_dir / INDEX_CACHE_NAME
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['version'] == PARSER_VERSION and cached['mtimes'] == mtimes:
+            return ReferenceIndex([ReferenceProfile.from_dict(data) for data in cached['profiles']])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    profiles = [parse_profile((profiles_dir / name).read_text(encoding='utf-8'), name) for name in mtimes]
+    payload = {'version': PARSER_VERSION, 'mtimes': mtimes, 'profiles': [asdict(profile) for profile in profiles]}
+    try:
+        fd, tmp_name = tempfile.mkstemp(dir=profiles_dir, prefix='.', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp_name, cache_path)
+    except OSError:
+        pass  # A read-only directory still gets the in-memory index
+    return ReferenceIndex(profiles)
+
+# Seconds between checks of the documents' mtimes; lookups in between use
+# the cached index without touching the disk
+RELOAD_CHECK_INTERVAL = 30.0
+
+# Directory -> (monotonic time of last check, document mtimes, index)
+_indexes: Dict[Path, Tuple[float, Dict[str, int], ReferenceIndex]] = {}
+_lock = threading.Lock()
+
+def get_reference_index(profiles_dir: PathLike = 'profiles', reload: bool = False) -> ReferenceIndex:
+    """
+    Process-wide index for a directory. Document mtimes are checked at most
+    once per RELOAD_CHECK_INTERVAL (or immediately with reload) and the
+    index is rebuilt only if one changed.
+    """
+    key = Path(os.path.abspath(profiles_dir))
+    now = time.monotonic()
+    with _lock:
+        cached = _indexes.get(key)
+        if cached is not None and not reload and now - cached[0] < RELOAD_CHECK_INTERVAL:
+            return cached[2]
+        mtimes = _source_mtimes(key)
+        if cached is None or cached[1] != mtimes:
+            cached = (now, mtimes, build_index(key))
+        else:
+            cached = (now, mtimes, cached[2])
+        _indexes[key] = cached
+        return cached[2]
+
+def reload_reference_index(profiles_dir: PathLike = 'profiles') -> ReferenceIndex:
+    """Check a directory's documents now, rebuilding its index if any changed."""
+    return get_reference_index(profiles_dir, reload=True)
@@ -0,0 +1,170 @@
+"""
+LLM response cache.
+
+Answers are keyed on a normalized question and a hash of everything else
+the prompt is built from (chart, daily reading, conversation history), so
+users who share a chart and ask the same thing on the same day, with the
+same history, reuse one answer instead of another model call. Entries live
+in a bounded in-memory LRU in front of a SQLite tier that expires entries
+after a TTL and evicts the least recently used ones past a size limit.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+PathLike = Union[str, Path]
+
+CACHE_PATH_ENV_VAR = 'BAZI_RESPONSE_CACHE'
+
+DEFAULT_CACHE_PATH = 'profiles/responses.sqlite3'
+
+# Entries held in memory per process
+MEMORY_CACHE_SIZE = 512
+
+# Entries kept on disk before least-recently-used ones are evicted
+MAX_DISK_ENTRIES = 20000
+
+# Seconds an answer stays valid; daily context is in the key, so this only
+# bounds how long a stale model answer can be served
+DEFAULT_TTL = 7 * 24 * 3600
+
+# Disk eviction runs once per this many writes
+EVICT_EVERY = 100
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(_PUNCTUATION.sub(" ", question.lower()).split())
+
+def prompt_context(inputs: Dict[str, Any], question_field: str = 'input') -> str:
+    """Hash of every prompt input except the question itself."""
+    context = {name: value for name, value in inputs.items() if name != question_field}
+    return hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def response_key(question: str, context: str) -> str:
+    """Cache key (SHA-256) for a question in a prompt context (see prompt_context)."""
+    material = "\x1f".join((normalize_question(question), context))
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            used_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_responses_used ON responses (used_at);
+    """
+
+    def __init__(self, db_path: PathLike, ttl: float = DEFAULT_TTL,
+                 memory_size: int = MEMORY_CACHE_SIZE, max_entries: int = MAX_DISK_ENTRIES):
+        """Responses in memory and in a SQLite database; one connection shared behind a lock."""
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for a key, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None and cached[1] > now:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return cached[0]
+            self._memory.pop(key, None)
+
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+            self._remember(key, row[0], row[1])
+            self._stats['disk_hits'] += 1
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response in both tiers."""
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, response, expires_at)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                    (key, response, expires_at, now),
+                )
+            self._stats['writes'] += 1
+            if self._stats['writes'] % EVICT_EVERY == 0:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired rows, then the least recently used rows past max_entries."""
+        with self._conn:
+            removed = self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+            removed += self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        self._stats['evictions'] += removed
+
+    def evict(self) -> None:
+        """Run disk eviction now."""
+        with self._lock:
+            self._evict(time.time())
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, with 'hits' totalled over both tiers and the hit rate."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        stats['hits'] = stats['memory_hits'] + stats['disk_hits']
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
+
+_caches: Dict[Path, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+def open_response_cache(db_path: Optional[PathLike] = None) -> ResponseCache:
+    """Get the process-wide response cache (defaults to $BAZI_RESPONSE_CACHE, then DEFAULT_CACHE_PATH)."""
+    path = Path(db_path or os.getenv(CACHE_PATH_ENV_VAR, DEFAULT_CACHE_PATH)).resolve()
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ResponseCache(path)
+        return _caches[path]
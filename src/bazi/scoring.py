@@ -0,0 +1,156 @@
+"""
+Chart scoring engine.
+
+Derives hidden stems, Ten Gods and a weighted five-element balance from a
+four-pillar chart. Everything is read from lookup tables built at import, so
+scoring one chart or a matrix of thousands costs a few array lookups.
+"""
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from src.bazi.chart import PILLARS
+from src.bazi.elements import ELEMENTS, PRODUCED_BY, SAME, STEM_ELEMENTS, relationship_codes
+from src.bazi.pillar import Pillar, Stem
+
+# Stems hidden in each branch, main qi first
+HIDDEN_STEMS = (
+    (9,),          # Zi: Gui
+    (5, 9, 7),     # Chou: Ji, Gui, Xin
+    (0, 2, 4),     # Yin: Jia, Bing, Wu
+    (1,),          # Mao: Yi
+    (4, 1, 9),     # Chen: Wu, Yi, Gui
+    (2, 6, 4),     # Si: Bing, Geng, Wu
+    (3, 5),        # Wu: Ding, Ji
+    (5, 3, 1),     # Wei: Ji, Ding, Yi
+    (6, 8, 4),     # Shen: Geng, Ren, Wu
+    (7,),          # You: Xin
+    (4, 7, 3),     # Xu: Wu, Xin, Ding
+    (8, 0),        # Hai: Ren, Jia
+)
+
+# Share of a branch's weight carried by each hidden stem, by number of stems
+HIDDEN_STEM_WEIGHTS = {1: (1.0,), 2: (0.7, 0.3), 3: (0.6, 0.3, 0.1)}
+
+# Ten God code = 2 * relationship code + (1 if polarities differ), with the
+# relationship read from the Day Master's side (see src.bazi.elements)
+TEN_GODS = (
+    'Friend', 'Rob Wealth',
+    'Eating God', 'Hurting Officer',
+    'Indirect Wealth', 'Direct Wealth',
+    'Seven Killings', 'Direct Officer',
+    'Indirect Resource', 'Direct Resource',
+)
+
+# TEN_GOD_MATRIX[day_master_stem, other_stem] -> Ten God code
+TEN_GOD_MATRIX = np.array(
+    [[2 * relationship_codes(STEM_ELEMENTS[dm], STEM_ELEMENTS[other]) + (dm + other) % 2
+      for other in range(10)] for dm in range(10)],
+    dtype=np.int8,
+)
+
+# Padded (12, 3) hidden stem table; -1 marks an empty slot
+HIDDEN_STEM_CODES = np.full((12, 3), -1, dtype=np.int8)
+HIDDEN_STEM_WEIGHT_TABLE = np.zeros((12, 3), dtype=np.float32)
+for _branch, _stems in enumerate(HIDDEN_STEMS):
+    HIDDEN_STEM_CODES[_branch, :len(_stems)] = _stems
+    HIDDEN_STEM_WEIGHT_TABLE[_branch, :len(_stems)] = HIDDEN_STEM_WEIGHTS[len(_stems)]
+
+# Element contribution of one stem and of one branch (through its hidden stems)
+STEM_ELEMENT_VECTORS = np.eye(5, dtype=np.float32)[list(STEM_ELEMENTS)]
+BRANCH_ELEMENT_VECTORS = np.zeros((12, 5), dtype=np.float32)
+for _branch, _stems in enumerate(HIDDEN_STEMS):
+    for _stem, _weight in zip(_stems, HIDDEN_STEM_WEIGHTS[len(_stems)]):
+        BRANCH_ELEMENT_VECTORS[_branch, STEM_ELEMENTS[_stem]] += _weight
+
+def score_charts(indices: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Score many charts at once.
+    Args:
+        indices: (N, 4) array of sexagenary indices in year, month, day, hour order
+    Returns:
+        Dictionary of arrays:
+            'balance': (N, 5) element weights in ELEMENTS order
+            'ten_gods': (N, 4) Ten God codes of the pillar stems
+            'hidden_ten_gods': (N, 4, 3) Ten God codes of the hidden stems (-1 if empty)
+            'support': (N,) share of the balance that supports the Day Master
+    """
+    indices = np.asarray(indices, dtype=np.int16).reshape(-1, 4)
+    stems = indices % 10
+    branches = indices % 12
+    day_masters = stems[:, 2]
+
+    balance = STEM_ELEMENT_VECTORS[stems].sum(axis=1) + BRANCH_ELEMENT_VECTORS[branches].sum(axis=1)
+
+    ten_gods = TEN_GOD_MATRIX[day_masters[:, None], stems]
+    hidden = HIDDEN_STEM_CODES[branches]
+    hidden_ten_gods = np.where(hidden >= 0,
+                               TEN_GOD_MATRIX[day_masters[:, None, None], np.maximum(hidden, 0)], -1)
+
+    # Elements that are the Day Master's own or produce it
+    day_master_elements = np.asarray(STEM_ELEMENTS)[day_masters]
+    supporting = np.isin(relationship_codes(day_master_elements[:, None], np.arange(5)[None, :]),
+                         (SAME, PRODUCED_BY))
+    support = (balance * supporting).sum(axis=1) / balance.sum(axis=1)
+
+    return {
+        'balance': balance,
+        'ten_gods': ten_gods.astype(np.int8),
+        'hidden_ten_gods': hidden_ten_gods.astype(np.int8),
+        'support': support.astype(np.float32),
+    }
+
+def analyze_chart(indices: Sequence[int]) -> Dict[str, Any]:
+    """
+    Analyze one chart.
+    Args:
+        indices: Sexagenary indices (year, month, day, hour), e.g. a chart's 'pillar_indices'
+    Returns:
+        Dictionary with the Day Master, per-pillar Ten Gods and hidden stems,
+        the element balance as percentages and the Day Master's strength
+    """
+    scores = score_charts(np.array([indices]))
+    day_master = Pillar(int(indices[2])).stem
+    balance = scores['balance'][0]
+    total = float(balance.sum())
+    support = float(scores['support'][0])
+
+    pillars = {}
+    for position, name in enumerate(PILLARS):
+        pillar = Pillar(int(indices[position]))
+        hidden: List[Dict[str, Any]] = []
+        for slot, stem_code in enumerate(HIDDEN_STEMS[pillar.branch.code]):
+            stem = Stem(stem_code)
+            hidden.append({
+                'stem': stem.name,
+                'element': stem.english,
+                'weight': float(HIDDEN_STEM_WEIGHT_TABLE[pillar.branch.code, slot]),
+                'ten_god': TEN_GODS[scores['hidden_ten_gods'][0, position, slot]],
+            })
+        pillars[name] = {
+            'pillar': pillar.chinese,
+            'ten_god': 'Day Master' if name == 'day' else TEN_GODS[scores['ten_gods'][0, position]],
+            'hidden_stems': hidden,
+        }
+
+    percentages = {element: round(100 * float(balance[i]) / total, 1) for i, element in enumerate(ELEMENTS)}
+    return {
+        'day_master': day_master.english,
+        'pillars': pillars,
+        'element_balance': percentages,
+        'dominant_element': ELEMENTS[int(balance.argmax())],
+        'weakest_element': ELEMENTS[int(balance.argmin())],
+        'day_master_support': round(support, 3),
+        'day_master_strength': 'Strong' if support > 0.5 else 'Weak',
+    }
+
+def format_chart_analysis(analysis: Dict[str, Any]) -> str:
+    """Render a chart analysis as compact text for prompts."""
+    lines = [f"Day Master: {analysis['day_master']} ({analysis['day_master_strength']}, "
+             f"{analysis['day_master_support']:.0%} support)"]
+    for name, pillar in analysis['pillars'].items():
+        hidden = ", ".join(f"{stem['stem']} {stem['ten_god']}" for stem in pillar['hidden_stems'])
+        lines.append(f"{name.title()} Pillar: {pillar['pillar']} - {pillar['ten_god']}; hidden: {hidden}")
+    lines.append("Element Balance: " + ", ".join(
+        f"{element} {share}%" for element, share in analysis['element_balance'].items()))
+    return "\n".join(lines)
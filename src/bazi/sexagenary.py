@@ -0,0 +1,186 @@
+"""
+Sexagenary (stem-branch) calendar engine.
+
+Computes the Year, Month and Day pillars for any Gregorian date arithmetically,
+so daily readings no longer depend on a hand-maintained CSV. Month and year
+boundaries come from the precomputed solar term table. Pillars are
+handled as sexagenary indices 0-59 (0 = Jia Zi); the stem is ``index % 10``
+and the branch is ``index % 12``.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Tuple, Union
+
+import numpy as np
+
+from src.bazi.elements import (
+    STEMS, BRANCHES, BRANCH_ANIMALS, ELEMENTS, STEM_ELEMENTS, stem_polarity
+)
+from src.bazi.solar_terms import (
+    MIN_YEAR, MAX_YEAR, Instant, day_end_minutes, solar_year_month
+)
+
+# Days are reckoned in China Standard Time, so a solar term that falls late on
+# a given day already governs that day's month pillar.
+CALENDAR_UTC_OFFSET_HOURS = 8
+
+# Offset that aligns numpy day counts with the sexagenary day cycle
+# (2025-02-24 was a Jia Zi day).
+_DAY_CYCLE_OFFSET = 17
+
+# Lookup tables from sexagenary index to display names
+PILLAR_CHINESE = tuple(f"{STEMS[i % 10]} {BRANCHES[i % 12]}" for i in range(60))
+PILLAR_ENGLISH = tuple(
+    f"{stem_polarity(i % 10)} {ELEMENTS[STEM_ELEMENTS[i % 10]]} {BRANCH_ANIMALS[i % 12]}"
+    for i in range(60)
+)
+
+# The twelve Day Officers in cycle order; the officer of a day is its offset
+# through this cycle from the month branch
+DAY_OFFICERS = ('Establish', 'Remove', 'Full', 'Balance', 'Stable', 'Initiate',
+                'Destruction', 'Danger', 'Success', 'Receive', 'Open', 'Close')
+
+DAY_OFFICER_MEANINGS = {
+    'Open': 'A day for new beginnings and starting projects. Good for initiating actions.',
+    'Close': 'A day for completing tasks and closing deals. Focus on finishing things.',
+    'Balance': 'A day for finding harmony and making balanced decisions.',
+    'Stable': 'A day for maintaining stability and routine tasks.',
+    'Remove': 'A day for clearing obstacles and removing negativity.',
+    'Full': 'A day of abundance and completion. Good for harvesting results.',
+    'Danger': 'A day to be cautious and avoid risky ventures.',
+    'Success': 'A day favorable for achieving goals and recognition.',
+    'Receive': 'A day for accepting and receiving benefits.',
+    'Establish': 'A day for establishing foundations and long-term plans.',
+    'Destruction': 'A day for breaking down old patterns, avoid major decisions.',
+    'Initiate': 'A day for taking initiative and leadership.'
+}
+
+_MIN_DAY = int(np.datetime64(f'{MIN_YEAR}-01-01', 'D').astype(np.int64))
+_MAX_DAY = int(np.datetime64(f'{MAX_YEAR}-12-31', 'D').astype(np.int64))
+
+DateLike = Union[date, datetime, str, np.datetime64]
+
+def pillar_index(stem: int, branch: int) -> int:
+    """Combine a stem code and a branch code into a sexagenary index."""
+    # Solve i % 10 == stem and i % 12 == branch (stem and branch share parity)
+    return (6 * stem - 5 * branch) % 60
+
+def pillar_names(index: int) -> Tuple[str, str]:
+    """Return the (pinyin, English) names of a sexagenary index."""
+    return PILLAR_CHINESE[index], PILLAR_ENGLISH[index]
+
+def _to_days(dates) -> np.ndarray:
+    """Convert a date or array of dates to int64 days since 1970-01-01."""
+    days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+    if np.any(days < _MIN_DAY) or np.any(days > _MAX_DAY):
+        raise ValueError(f"Dates must fall between {MIN_YEAR} and {MAX_YEAR}")
+    return days
+
+def day_indices(days: np.ndarray) -> np.ndarray:
+    """Day pillar sexagenary indices for int day counts since 1970-01-01."""
+    return (np.asarray(days, dtype=np.int64) + _DAY_CYCLE_OFFSET) % 60
+
+def day_officer_codes(month_branches: np.ndarray, day_branches: np.ndarray) -> np.ndarray:
+    """
+    Day Officer codes (positions in DAY_OFFICERS) for arrays of branch codes.
+
+    The officer cycle restarts at Establish on the day whose branch matches
+    the month branch, so the officer is the day branch's offset from it.
+    """
+    month_branches = np.asarray(month_branches, dtype=np.int16)
+    day_branches = np.asarray(day_branches, dtype=np.int16)
+    return ((day_branches - month_branches) % 12).astype(np.int8)
+
+def _year_month_indices(solar_year: np.ndarray, solar_month: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Year and month sexagenary indices from solar year and solar month."""
+    year_index = (solar_year - 4) % 60
+
+    # Month stems follow the "five tigers" rule: Jia/Ji years start at Bing Yin
+    year_stem = year_index % 10
+    month_stem = (2 * (year_stem % 5) + 2 + solar_month) % 10
+    month_branch = (solar_month + 2) % 12
+    month_index = (6 * month_stem - 5 * month_branch) % 60
+    return year_index, month_index
+
+def _compute(days: np.ndarray) -> Dict[str, np.ndarray]:
+    """Compute year, month and day sexagenary indices for day counts."""
+    # A solar term anywhere within the local day governs that whole day
+    day_end = day_end_minutes(days, CALENDAR_UTC_OFFSET_HOURS)
+    year_index, month_index = _year_month_indices(*solar_year_month(day_end, inclusive=False))
+
+    day_index = day_indices(days)
+    return {
+        'year': year_index.astype(np.int8),
+        'month': month_index.astype(np.int8),
+        'day': day_index.astype(np.int8),
+        'officer': day_officer_codes(month_index % 12, day_index % 12),
+    }
+
+def get_year_month_at(instants: Instant) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Year and month sexagenary indices in force at exact instants.
+
+    Unlike the date-based lookups this compares against the solar term
+    instant itself, which is what birth charts near a term boundary need.
+    Args:
+        instants: Minutes since 1970-01-01 UTC (scalar or array) or a datetime
+    """
+    year_index, month_index = _year_month_indices(*solar_year_month(instants))
+    return year_index.astype(np.int8), month_index.astype(np.int8)
+
+def get_pillars_array(dates: Iterable[DateLike], names: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Compute Year, Month and Day pillars for an array of dates in one pass.
+    Args:
+        dates: Anything numpy can convert to ``datetime64[D]``
+        names: Also return pinyin/English name arrays for each pillar
+    Returns:
+        Dictionary of int8 sexagenary index arrays keyed 'year', 'month', 'day',
+        an int8 Day Officer code array keyed 'officer' (plus
+        '<pillar>_chinese' / '<pillar>_english' and 'officer_name' arrays
+        when names=True)
+    """
+    pillars = _compute(_to_days(dates))
+    if names:
+        chinese = np.array(PILLAR_CHINESE)
+        english = np.array(PILLAR_ENGLISH)
+        for key in ('year', 'month', 'day'):
+            pillars[f'{key}_chinese'] = chinese[pillars[key]]
+            pillars[f'{key}_english'] = english[pillars[key]]
+        pillars['officer_name'] = np.array(DAY_OFFICERS)[pillars['officer']]
+    return pillars
+
+def get_pillar_indices(day: DateLike) -> Tuple[int, int, int]:
+    """Return the (year, month, day) sexagenary indices for a single date."""
+    pillars = _compute(_to_days([as_date(day)]))
+    return int(pillars['year'][0]), int(pillars['month'][0]), int(pillars['day'][0])
+
+def get_pillars(day: DateLike) -> Dict[str, Any]:
+    """
+    Get the Year, Month and Day pillars and the Day Officer for a date.
+    Returns:
+        Dictionary using the same keys as the daily Bazi CSV columns
+    """
+    day = as_date(day)
+    year_index, month_index, day_index = get_pillar_indices(day)
+    return {
+        'Date': day,
+        'Day Pillar': PILLAR_CHINESE[day_index],
+        'Day Pillar English': PILLAR_ENGLISH[day_index],
+        'Month Pillar': PILLAR_CHINESE[month_index],
+        'Month Pillar English': PILLAR_ENGLISH[month_index],
+        'Year Pillar': PILLAR_CHINESE[year_index],
+        'Year Pillar English': PILLAR_ENGLISH[year_index],
+        'Day Officer': DAY_OFFICERS[(day_index - month_index) % 12],
+    }
+
+def as_date(day: DateLike) -> date:
+    """Normalise supported date inputs to a ``datetime.date``."""
+    if isinstance(day, datetime):
+        return day.date()
+    if isinstance(day, date):
+        return day
+    if isinstance(day, str):
+        return datetime.fromisoformat(day.strip()[:10]).date()
+    if hasattr(day, 'date'):
+        return day.date()
+    return np.datetime64(day, 'D').astype(date)
@@ -0,0 +1,55 @@
+"""
+Process-wide shared calendars.
+
+Calendar data is immutable between file edits, so every Streamlit session in
+a process shares one loaded calendar per data file instead of holding its
+own copy. A calendar is reloaded only when its file's mtime changes.
+"""
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+_lock = threading.Lock()
+
+# Resolved path -> (mtime_ns, loader, calendar object)
+_calendars: Dict[Path, Tuple[int, Callable[[str], Any], Any]] = {}
+
+_stats = {'loads': 0, 'reloads': 0, 'hits': 0}
+
+def get_shared_calendar(path: str, loader: Callable[[str], Any]) -> Any:
+    """
+    Get the process-wide calendar for a data file.
+    Args:
+        path: Calendar data file (its mtime decides when to reload)
+        loader: Callable that builds the calendar object from the path
+    Returns:
+        The shared calendar object, loaded on first use or after the file changed.
+        If the file cannot be stat'ed (e.g. it is missing) the loader is called
+        uncached, so it handles the problem as it would without sharing.
+    """
+    key = Path(path).resolve()
+    try:
+        mtime = key.stat().st_mtime_ns
+    except OSError:
+        return loader(str(path))
+
+    with _lock:
+        cached = _calendars.get(key)
+        if cached is not None and cached[0] == mtime and cached[1] is loader:
+            _stats['hits'] += 1
+            return cached[2]
+
+        calendar = loader(str(path))
+        _calendars[key] = (mtime, loader, calendar)
+        _stats['reloads' if cached is not None else 'loads'] += 1
+        return calendar
+
+def get_calendar_stats() -> Dict[str, int]:
+    """Counts of initial loads, mtime-triggered reloads and cache hits."""
+    with _lock:
+        return dict(_stats)
+
+def clear_shared_calendars() -> None:
+    """Drop all shared calendars so the next request loads them afresh."""
+    with _lock:
+        _calendars.clear()
@@ -0,0 +1,215 @@
+"""
+Solar term (jieqi) boundary table.
+
+The 24 solar term instants for 1900-2100 are precomputed once and stored as a
+sorted int32 array of minutes since 1970-01-01 UTC (``data/solar_terms.bin``).
+Month and year pillar lookups binary-search this table, so no astronomy runs
+at request time. Rebuild the table with::
+
+    python -m src.bazi.solar_terms build
+"""
+import sys
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Tuple, Union
+
+import numpy as np
+
+MIN_YEAR = 1900
+MAX_YEAR = 2100
+
+# The table starts a year early so early-January dates of MIN_YEAR still have
+# a preceding term (Da Xue / Dong Zhi of the previous year).
+_TABLE_FIRST_YEAR = MIN_YEAR - 1
+
+TABLE_PATH = Path(__file__).parent.parent.parent / 'data' / 'solar_terms.bin'
+
+# Solar terms in calendar order, starting with Xiao Han (early January).
+# Even positions are the "jie" terms that open a solar month.
+SOLAR_TERMS = (
+    'Xiao Han', 'Da Han', 'Li Chun', 'Yu Shui', 'Jing Zhe', 'Chun Fen',
+    'Qing Ming', 'Gu Yu', 'Li Xia', 'Xiao Man', 'Mang Zhong', 'Xia Zhi',
+    'Xiao Shu', 'Da Shu', 'Li Qiu', 'Chu Shu', 'Bai Lu', 'Qiu Fen',
+    'Han Lu', 'Shuang Jiang', 'Li Dong', 'Xiao Xue', 'Da Xue', 'Dong Zhi',
+)
+
+# Births closer than this to a term are flagged, since the table is only
+# accurate to roughly a quarter of an hour.
+BOUNDARY_MARGIN_MINUTES = 30
+
+# Julian Day of 1970-01-01 00:00 UTC
+_UNIX_EPOCH_JD = 2440587.5
+
+_MINUTES_PER_DAY = 1440
+
+Instant = Union[datetime, int, np.ndarray]
+
+def _solar_longitude(jd: np.ndarray) -> np.ndarray:
+    """Apparent geocentric longitude of the Sun in degrees (low precision).
+
+    Meeus, Astronomical Algorithms ch. 25; accurate to about 0.01 degree.
+    """
+    t = (jd - 2451545.0) / 36525.0
+    mean_longitude = 280.46646 + 36000.76983 * t + 0.0003032 * t * t
+    mean_anomaly = np.radians(357.52911 + 35999.05029 * t - 0.0001537 * t * t)
+    center = ((1.914602 - 0.004817 * t - 0.000014 * t * t) * np.sin(mean_anomaly)
+              + (0.019993 - 0.000101 * t) * np.sin(2 * mean_anomaly)
+              + 0.000289 * np.sin(3 * mean_anomaly))
+    omega = np.radians(125.04 - 1934.136 * t)
+    return (mean_longitude + center - 0.00569 - 0.00478 * np.sin(omega)) % 360.0
+
+def _delta_t_seconds(year: np.ndarray) -> np.ndarray:
+    """TT - UT in seconds (Espenak & Meeus polynomial fits, 1900-2150)."""
+    y = np.asarray(year, dtype=np.float64)
+    conditions = [y < 1920, y < 1941, y < 1961, y < 1986, y < 2005, y < 2050]
+    t = [y - 1900, y - 1920, y - 1950, y - 1975, y - 2000, y - 2000]
+    values = [
+        -2.79 + 1.494119 * t[0] - 0.0598939 * t[0] ** 2 + 0.0061966 * t[0] ** 3
+        - 0.000197 * t[0] ** 4,
+        21.20 + 0.84493 * t[1] - 0.076100 * t[1] ** 2 + 0.0020936 * t[1] ** 3,
+        29.07 + 0.407 * t[2] - t[2] ** 2 / 233 + t[2] ** 3 / 2547,
+        45.45 + 1.067 * t[3] - t[3] ** 2 / 260 - t[3] ** 3 / 718,
+        63.86 + 0.3345 * t[4] - 0.060374 * t[4] ** 2 + 0.0017275 * t[4] ** 3
+        + 0.000651814 * t[4] ** 4 + 0.00002373599 * t[4] ** 5,
+        62.92 + 0.32217 * t[5] + 0.005589 * t[5] ** 2,
+    ]
+    default = -20 + 32 * ((y - 1820) / 100) ** 2 - 0.5628 * (2150 - y)
+    return np.select(conditions, values, default)
+
+def compute_term_instants(start_year: int = _TABLE_FIRST_YEAR, end_year: int = MAX_YEAR) -> np.ndarray:
+    """
+    Compute all solar term instants for a span of years (build-time only).
+    Returns:
+        Sorted int32 array of minutes since 1970-01-01 UTC, 24 entries per year
+    """
+    years = np.repeat(np.arange(start_year, end_year + 1), 24)
+    positions = np.tile(np.arange(24), end_year - start_year + 1)
+    targets = (285.0 + 15.0 * positions) % 360.0
+
+    # Start from the mean date of each term and refine with Newton steps
+    jan_first = np.array([f'{y}-01-01' for y in years], dtype='datetime64[D]')
+    jd = _UNIX_EPOCH_JD + jan_first.astype(np.float64) + 5.0 + positions * 365.2422 / 24
+    for _ in range(6):
+        error = (targets - _solar_longitude(jd) + 180.0) % 360.0 - 180.0
+        jd += error * 365.2422 / 360.0
+
+    # The solar longitude is evaluated in Terrestrial Time; convert to UT
+    jd -= _delta_t_seconds(years) / 86400.0
+    minutes = np.rint((jd - _UNIX_EPOCH_JD) * _MINUTES_PER_DAY)
+    return minutes.astype(np.int32)
+
+def build_table(path: Path = TABLE_PATH) -> Path:
+    """Compute the solar term table and write it to disk."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    compute_term_instants().astype('<i4').tofile(path)
+    load_term_table.cache_clear()
+    return path
+
+@lru_cache(maxsize=None)
+def load_term_table() -> np.ndarray:
+    """Load the precomputed solar term table (computed in memory if missing)."""
+    try:
+        table = np.fromfile(TABLE_PATH, dtype='<i4')
+        if len(table) == (MAX_YEAR - _TABLE_FIRST_YEAR + 1) * 24:
+            return table
+    except OSError:
+        pass
+    print(f"Solar term table {TABLE_PATH} missing or stale, computing it in memory")
+    return compute_term_instants()
+
+def to_minutes(moment: datetime) -> int:
+    """Convert a datetime to minutes since 1970-01-01 UTC (naive means UTC)."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() // 60)
+
+def _as_minutes(instants: Instant) -> np.ndarray:
+    """Normalise a datetime, minute count or array of minute counts."""
+    if isinstance(instants, datetime):
+        instants = to_minutes(instants)
+    return np.asarray(instants, dtype=np.int64)
+
+def term_positions(instants: Instant, inclusive: bool = True) -> np.ndarray:
+    """
+    Binary-search the table for the most recent solar term at each instant.
+    Args:
+        instants: Minutes since 1970-01-01 UTC (scalar or array) or a datetime
+        inclusive: Count a term falling exactly on the instant as already passed
+    Returns:
+        Table positions (year offset * 24 + term number)
+    """
+    minutes = _as_minutes(instants)
+    table = load_term_table()
+    positions = np.searchsorted(table, minutes, side='right' if inclusive else 'left') - 1
+    if np.any(positions < 0) or np.any(minutes > int(table[-1]) + 31 * _MINUTES_PER_DAY):
+        raise ValueError(f"Instants must fall between {MIN_YEAR} and {MAX_YEAR}")
+    return positions
+
+def solar_year_month(instants: Instant, inclusive: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solar year and solar month in force at each instant.
+    Returns:
+        (solar_year, solar_month) arrays; month 0 is the Yin month opened by
+        Li Chun and month 11 the Chou month opened by Xiao Han
+    """
+    positions = term_positions(instants, inclusive)
+    jie = (positions % 24) // 2
+    solar_month = (jie - 1) % 12
+    # Xiao Han falls before Li Chun, so it still belongs to the previous year
+    solar_year = _TABLE_FIRST_YEAR + positions // 24 - (jie == 0)
+    return solar_year, solar_month
+
+def day_end_minutes(days: np.ndarray, utc_offset_hours: float) -> np.ndarray:
+    """Minutes since epoch at the end of each local calendar day."""
+    days = np.asarray(days, dtype=np.int64)
+    return (days + 1) * _MINUTES_PER_DAY - int(utc_offset_hours * 60)
+
+def minutes_to_nearest_term(instants: Instant) -> np.ndarray:
+    """Absolute distance in minutes from each instant to the closest solar term."""
+    minutes = _as_minutes(instants)
+    table = load_term_table()
+    following = np.searchsorted(table, minutes)
+    before = table[np.clip(following - 1, 0, len(table) - 1)]
+    after = table[np.clip(following, 0, len(table) - 1)]
+    return np.minimum(np.abs(minutes - before), np.abs(after - minutes))
+
+def surrounding_jie(instants: Instant) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Month-opening (jie) terms on either side of each instant.
+    Returns:
+        (previous, following) arrays of term instants in minutes since the epoch
+    """
+    table = load_term_table()
+    positions = term_positions(instants)
+    # Each table year starts at Xiao Han, so jie sit at even positions
+    previous = positions - positions % 2
+    following = np.minimum(previous + 2, len(table) - 1)
+    return table[previous].astype(np.int64), table[following].astype(np.int64)
+
+def nearest_term(moment: datetime) -> Dict[str, Any]:
+    """
+    Find the solar term closest to a moment.
+    Returns:
+        Dictionary with the term name, its UTC instant, the signed distance in
+        minutes (negative if the term is still ahead) and a near_boundary flag
+    """
+    minutes = to_minutes(moment)
+    table = load_term_table()
+    position = int(term_positions(minutes))
+    if position + 1 < len(table) and table[position + 1] - minutes < minutes - table[position]:
+        position += 1
+    distance = minutes - int(table[position])
+    return {
+        'term': SOLAR_TERMS[position % 24],
+        'instant': datetime.fromtimestamp(int(table[position]) * 60, tz=timezone.utc),
+        'minutes_from_term': distance,
+        'near_boundary': abs(distance) <= BOUNDARY_MARGIN_MINUTES,
+    }
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'build':
+        print(f"Wrote {build_table()}")
+    else:
+        print("Usage: python -m src.bazi.solar_terms build")
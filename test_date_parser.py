@@ -6,11 +6,14 @@ import pandas as pd
 import re
 from typing import Optional, Tuple, Dict
 
+from src.bazi.calendar_index import CalendarIndex
+
 class BaziDateParser:
     def __init__(self, bazi_data_file: str):
         """Initialize with path to BAZI data CSV file."""
         self.bazi_data_file = bazi_data_file
         self.bazi_df = None
+        self.calendar_index = None
         self._load_data()
         
     def _load_data(self):
@@ -19,6 +22,7 @@ class BaziDateParser:
             self.bazi_df = pd.read_csv(self.bazi_data_file)
             # Convert date strings to datetime
             self.bazi_df['Date'] = pd.to_datetime(self.bazi_df['Date'], format='%a %m/%d/%Y')
+            self.calendar_index = CalendarIndex(self.bazi_df)
             print(f"Loaded {len(self.bazi_df)} BAZI readings")
         except Exception as e:
             print(f"Error loading BAZI data: {str(e)}")
@@ -72,18 +76,17 @@ class BaziDateParser:
     
     def get_bazi_reading(self, date: datetime) -> Optional[Dict]:
         """Get BAZI reading for the specified date."""
-        if self.bazi_df is None:
+        if self.calendar_index is None:
             return None
             
         try:
             # Find the reading for the exact date
-            daily_data = self.bazi_df[self.bazi_df['Date'].dt.date == date.date()]
+            reading = self.calendar_index.get(date)
             
-            if daily_data.empty:
+            if reading is None:
                 print(f"No BAZI reading found for {date.date()}")
                 return None
                 
-            reading = daily_data.iloc[0].to_dict()
             print(f"Found BAZI reading for {date.date()}:")
             print(f"Day Pillar: {reading['Day Pillar']} ({reading['Day Pillar English']})")
             print(f"Day Officer: {reading['Day Officer']}")
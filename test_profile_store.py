@@ -0,0 +1,38 @@
+"""
+Tests for the profile repositories.
+"""
+import pytest
+
+from src.bazi.profile_store import JsonProfileRepository, SqliteProfileRepository
+
+@pytest.fixture(params=['json', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'json':
+        yield JsonProfileRepository(tmp_path)
+    else:
+        repository = SqliteProfileRepository(tmp_path / 'profiles.sqlite3')
+        yield repository
+        repository.close()
+
+def test_same_name_without_id_never_overwrites(store):
+    first = store.save({'name': 'Alex', 'gender': 'Male'})
+    second = store.save({'name': 'Alex', 'gender': 'Female'})
+    assert first != second
+    assert store.count() == 2
+    assert store.get(first)['gender'] == 'Male'
+    assert store.get(second)['gender'] == 'Female'
+
+def test_saving_with_held_id_replaces_profile(store):
+    profile = {'name': 'Alex', 'gender': 'Male'}
+    id = store.save(profile)
+    profile['gender'] = 'Female'
+    assert store.save(profile) == id
+    assert store.count() == 1
+    assert store.get(id)['gender'] == 'Female'
+
+def test_editing_a_loaded_profile_does_not_change_the_store(store):
+    id = store.save({'name': 'Alex', 'bazi_chart': {'day_master': 'Yang Wood'}})
+    loaded = store.get(id)
+    loaded['bazi_chart']['day_master'] = 'Yin Fire'
+    loaded['gender'] = 'Male'
+    assert store.get(id) == {'id': id, 'name': 'Alex', 'bazi_chart': {'day_master': 'Yang Wood'}}